@@ -57,12 +57,19 @@ if __name__ == "__main__":
 ##########################
 
 from flask import Flask, request, jsonify
-from faker import Faker
 import pandas as pd
+import numpy as np
 import json
+import os
+import sys
+
+# Faker pools live alongside the final pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "final"))
+from faker_pools import FakerPools
 
 app = Flask(__name__)
-faker = Faker()
+# Each Faker method in a mapping is generated once into a disk-cached pool, then sampled per column
+pools = FakerPools()
 
 # 🔁 In-memory store
 memory = {
@@ -101,19 +108,21 @@ def generate():
         lines = layout.strip().split("\n")
         headers = [line.split(",")[0].strip() for line in lines[1:]]
 
-        data = []
-        for _ in range(500):  # number of mock rows
-            row = {}
-            for col in headers:
-                method = mapping.get(col)
-                if method and hasattr(faker, method):
-                    value = getattr(faker, method)()
-                    row[col] = value
-                else:
-                    row[col] = ""
-            data.append(row)
-
-        df = pd.DataFrame(data)
+        options = request.get_json(silent=True) or {}
+        rows = int(options.get("rows", 500))  # number of mock rows
+        # Largest expected share of repeated values per column; grows the pools to match
+        max_duplicates = options.get("max_duplicates")
+
+        data = {}
+        for col in headers:
+            method = mapping.get(col)
+            if pools.supports(method):
+                data[col] = pools.sample(method, rows, max_duplicates)
+            else:
+                data[col] = np.full(rows, "", dtype=object)
+        pools.flush()
+
+        df = pd.DataFrame(data, columns=headers)
         df.to_csv("mock_output.csv", index=False)
         return jsonify({"message": "Mock data saved."})
     except Exception as e:
@@ -0,0 +1,91 @@
+import difflib
+import numpy as np
+from collections import defaultdict, Counter
+
+class AliasIndex:
+    """Name lookup over KB columns: exact normalized-name map plus a bigram count filter.
+
+    If SequenceMatcher finds M matching characters in B blocks between a and b, the
+    blocks' inner bigrams are shared, so the bigram multisets overlap in at least
+    M - B >= 3M - (len(a) + len(b)) - 1 places. For a ratio cutoff c that is
+    (1.5c - 1)(len(a) + len(b)) - 1, which rules out almost every KB name before the
+    same difflib call is run on the survivors, in KB insertion order.
+    """
+
+    def __init__(self):
+        self.order = {}
+        self.names = defaultdict(list)
+        self.exact = {}
+        self.entry_canons = []
+        self.entry_lengths = []
+        self.postings = defaultdict(lambda: ([], []))
+        self._arrays = {}
+        self._lengths = None
+
+    @staticmethod
+    def normalize(name):
+        return name.lower()
+
+    @staticmethod
+    def bigrams(name):
+        return Counter(name[i:i + 2] for i in range(len(name) - 1))
+
+    @classmethod
+    def build(cls, columns):
+        index = cls()
+        for canon, aliases in columns.items():
+            index.add(canon, canon)
+            for alias in aliases:
+                index.add(canon, alias)
+        return index
+
+    def add(self, canon, name):
+        self.order.setdefault(canon, len(self.order))
+        key = self.normalize(name)
+        if key in self.names[canon]:
+            return
+        self.names[canon].append(key)
+        current = self.exact.get(key)
+        if current is None or self.order[canon] < self.order[current]:
+            self.exact[key] = canon
+
+        entry = len(self.entry_canons)
+        self.entry_canons.append(canon)
+        self.entry_lengths.append(len(key))
+        self._lengths = None
+        for gram, count in self.bigrams(key).items():
+            ids, counts = self.postings[gram]
+            ids.append(entry)
+            counts.append(count)
+            self._arrays.pop(gram, None)
+
+    def _array(self, gram):
+        # numpy copies of the posting lists, rebuilt only for grams touched since last use
+        if gram not in self._arrays:
+            ids, counts = self.postings[gram]
+            self._arrays[gram] = (np.array(ids, dtype=np.int64), np.array(counts, dtype=np.int64))
+        return self._arrays[gram]
+
+    def lookup(self, name):
+        return self.exact.get(self.normalize(name))
+
+    def fuzzy(self, name, cutoff=0.85):
+        key = self.normalize(name)
+        if not self.entry_canons:
+            return None
+        if self._lengths is None:
+            self._lengths = np.array(self.entry_lengths, dtype=np.int64)
+        lengths = self._lengths
+        overlap = np.zeros(len(lengths), dtype=np.int64)
+        for gram, count in self.bigrams(key).items():
+            if gram in self.postings:
+                ids, counts = self._array(gram)
+                overlap[ids] += np.minimum(counts, count)
+
+        total = len(key) + lengths
+        ok = (2 * np.minimum(len(key), lengths) >= cutoff * total) & (overlap >= (1.5 * cutoff - 1) * total - 1)
+        candidates = {self.entry_canons[i] for i in np.flatnonzero(ok)}
+        for canon in sorted(candidates, key=self.order.__getitem__):
+            if difflib.get_close_matches(key, self.names[canon], n=1, cutoff=cutoff):
+                return canon
+        return None
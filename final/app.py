@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
 import os
 import tempfile
 
 from main import run_pipeline  # your main logic as a callable
+from mock_generator import MockDataGenerator
+from generation_plan import GenerationPlan
+
+PAGE_ROWS = 10
 
 st.set_page_config(page_title="Mock Data Generator", layout="centered")
 st.title("📄 Mock Data Generator")
@@ -11,7 +14,8 @@ st.write("Upload a raw data file and get realistic mock data based on patterns l
 
 uploaded_file = st.file_uploader("Upload a raw .csv/.dat/.txt file", type=["csv", "dat", "txt"])
 
-records = st.slider("Number of mock records to generate", 100, 5000, step=100, value=500)
+records = st.number_input("Number of mock records to generate", min_value=1, step=100, value=500)
+seed = st.number_input("Random seed", min_value=0, step=1, value=0)
 
 if uploaded_file:
     st.success("✅ File uploaded successfully.")
@@ -29,17 +33,27 @@ if uploaded_file:
 
             # Run main logic
             try:
-                run_pipeline(input_path, output_path, records)
+                headers, plan = run_pipeline(input_path, output_path, records, seed=seed, random_access=True)
+                # The plan behind this download, so later KB updates cannot change its preview
+                st.session_state["preview"] = {"headers": headers, "records": records, "seed": seed,
+                                               "plan": plan.to_dict()}
                 st.success("✅ Mock data generated!")
 
-                # Show preview
-                df = pd.read_csv(output_path)
-                st.dataframe(df.head(10))
-
                 # Download link
-                st.download_button("📥 Download CSV", data=df.to_csv(index=False),
-                                   file_name="mock_data.csv", mime="text/csv")
+                with open(output_path, "rb") as f:
+                    st.download_button("📥 Download CSV", data=f,
+                                       file_name="mock_data.csv", mime="text/csv")
             except Exception as e:
                 st.error(f"❌ Error: {e}")
             finally:
                 tmp_dir.cleanup()
+
+# Rows are a pure function of (seed, column, row index), so any page is generated on its own
+if "preview" in st.session_state:
+    preview = st.session_state["preview"]
+    pages = (preview["records"] + PAGE_ROWS - 1) // PAGE_ROWS
+    page = st.number_input(f"Preview page (of {pages})", min_value=1, max_value=pages, value=1)
+    plan = GenerationPlan.from_dict(preview["plan"])
+    generator = MockDataGenerator.from_plan(plan, preview["records"], preview["seed"], random_access=True)
+    start = (page - 1) * PAGE_ROWS
+    st.dataframe(generator.generate_range(preview["headers"], start, min(start + PAGE_ROWS, preview["records"])))
@@ -0,0 +1,24 @@
+import hashlib
+import numpy as np
+
+# Counter-based randomness: the value drawn for row i is a pure function of (key, i),
+# so any row range can be produced without generating the rows before it.
+
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def key64(*parts):
+    digest = hashlib.blake2b(":".join(str(p) for p in parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def mix64(x):
+    # splitmix64 finalizer over uint64 arrays (wrapping arithmetic)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def random_bits(key, start, n):
+    rows = np.arange(start, start + n, dtype=np.uint64)
+    return mix64(np.uint64(key) + (rows + np.uint64(1)) * GOLDEN)
+
+def uniforms(key, start, n):
+    return (random_bits(key, start, n) >> np.uint64(11)) * (1.0 / (1 << 53))
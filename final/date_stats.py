@@ -0,0 +1,122 @@
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+# Tried in order; the first that parses every sampled value names the column's format
+DATE_FORMATS = [
+    "%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d.%m.%Y",
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d %H:%M:%S", "%Y-%m-%d %H:%M",
+    "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%d-%b-%Y",
+]
+DATE_LIKE = re.compile(r"\d{1,4}[-/.](\d{1,2}|[A-Za-z]{3})[-/.]\d{2,4}")
+TIME_TOKENS = ("%H", "%M", "%S", "%f")
+MONTH_ABBR = np.frombuffer(b"JanFebMarAprMayJunJulAugSepOctNovDec", dtype=np.uint8).reshape(12, 3)
+# "00" .. "99" as a (100, 2) byte table, so two digits are one gather
+PAIRS = np.frombuffer("".join(f"{i:02d}" for i in range(100)).encode("ascii"), dtype=np.uint8).reshape(100, 2)
+
+# ------------ Format Detection ------------
+def detect_format(values, sample=20):
+    """First of DATE_FORMATS that parses all of the first `sample` values, or None."""
+    head = values[:sample]
+    if not head or not all(DATE_LIKE.match(v) for v in head):
+        return None
+    for fmt in DATE_FORMATS:
+        if pd.to_datetime(pd.Series(head), format=fmt, errors="coerce").notna().all():
+            return fmt
+    return None
+
+def unit_for(fmt):
+    return "s" if any(token in fmt for token in TIME_TOKENS) else "D"
+
+# ------------ Date Stats ------------
+class DateStats:
+    """Count, range and formats of a column's date/timestamp values, mergeable like NumericStats.
+
+    min/max are ISO strings at second resolution; `formats` counts parsed values per format.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.formats = Counter()
+
+    def update(self, values):
+        values = [v for v in values if v]
+        fmt = detect_format(values)
+        if fmt is None:
+            return self
+        parsed = pd.to_datetime(pd.Series(values), format=fmt, errors="coerce").dropna()
+        if parsed.empty:
+            return self
+        other = DateStats()
+        other.count = len(parsed)
+        other.min = parsed.min().strftime("%Y-%m-%dT%H:%M:%S")
+        other.max = parsed.max().strftime("%Y-%m-%dT%H:%M:%S")
+        other.formats[fmt] = len(parsed)
+        return self.merge(other)
+
+    def merge(self, other):
+        self.count += other.count
+        if other.min is not None:
+            # ISO strings of one layout order the same way as the dates they hold
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.formats.update(other.formats)
+        return self
+
+    @property
+    def format(self):
+        return self.formats.most_common(1)[0][0] if self.formats else None
+
+    def to_dict(self):
+        return {"count": self.count, "min": self.min, "max": self.max, "formats": dict(self.formats)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        if data:
+            stats.count = data["count"]
+            stats.min, stats.max = data["min"], data["max"]
+            stats.formats = Counter(data["formats"])
+        return stats
+
+# ------------ Bulk Formatting ------------
+def _fields(dates):
+    """Byte-matrix builders for each supported strftime field of `dates`."""
+    days = dates.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    seconds = (dates.astype("datetime64[s]") - days).astype(np.int32)
+    year = (months.astype(np.int64) // 12 + 1970).astype(np.int32)
+    month = (months.astype(np.int64) % 12).astype(np.int32)
+    return {
+        "%Y": lambda: np.hstack((PAIRS[year // 100], PAIRS[year % 100])),
+        "%y": lambda: PAIRS[year % 100],
+        "%m": lambda: PAIRS[month + 1],
+        "%b": lambda: MONTH_ABBR[month],
+        "%d": lambda: PAIRS[(days - months).astype(np.int32) + 1],
+        "%H": lambda: PAIRS[seconds // 3600],
+        "%M": lambda: PAIRS[seconds // 60 % 60],
+        "%S": lambda: PAIRS[seconds % 60],
+    }
+
+def format_dates(dates, fmt):
+    """Text of a datetime64 array in strftime format `fmt`, as a string array.
+
+    Each field is computed for the whole array with integer arithmetic and its digits looked
+    up as bytes into one matrix (years 0-9999); formats with other fields (%B, %f, ...) go through pandas.
+    """
+    fields = _fields(dates)
+    tokens = [t for t in re.split(r"(%.)", fmt) if t]
+    if any(t.startswith("%") and t not in fields for t in tokens):
+        return pd.DatetimeIndex(dates).strftime(fmt).to_numpy(dtype=str)
+    parts = []
+    for t in tokens:
+        if t in fields:
+            parts.append(fields[t]())
+        else:
+            literal = np.frombuffer(t.encode("utf-8"), dtype=np.uint8)
+            parts.append(np.broadcast_to(literal, (len(dates), len(literal))))
+    out = np.ascontiguousarray(np.hstack(parts)) if parts else np.zeros((len(dates), 0), dtype=np.uint8)
+    return out.view(f"S{max(out.shape[1], 1)}").ravel().astype(str)
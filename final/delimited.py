@@ -0,0 +1,119 @@
+import csv
+import io
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pandas' C engine reads the same files, just more slowly
+    pa_csv = None
+
+# ------------ Delimited Reader ------------
+def split_records(lines, delim):
+    """Records of already-read `lines` with quoting applied, so a quoted field may hold the
+    delimiter or span several lines."""
+    return list(csv.reader(io.StringIO("\n".join(line.strip() for line in lines)), delimiter=delim))
+
+def _record_width(filepath, delim):
+    with open(filepath, "r", newline="") as f:
+        for record in csv.reader(f, delimiter=delim):
+            if any(record):
+                return len(record)
+    return 0
+
+def iter_delimited_columns(filepath, delim, chunk_rows=50_000, skip_header=False, block_size=1 << 22):
+    """Per block of records, one list of string values per column, parsed by a native reader.
+
+    pyarrow's streaming CSV reader is used when installed (blocks of `block_size` bytes), else
+    pandas' C engine in chunks of `chunk_rows`. Both honour double-quoted fields, including
+    doubled quotes and embedded newlines, and skip blank lines. The column count comes from
+    the first record: short records are padded with empty strings in place, and records
+    with extra fields are skipped with a warning.
+    """
+    width = _record_width(filepath, delim)
+    if not width:
+        return
+    names = [f"c{i}" for i in range(width)]
+    if pa_csv is not None:
+        yield from _iter_arrow_columns(filepath, delim, names, skip_header, block_size)
+        return
+    # index_col=False: a wide first data row is cut to size rather than taken as an index
+    chunks = pd.read_csv(filepath, sep=delim, header=0 if skip_header else None, names=names, dtype=str,
+                         na_filter=False, engine="c", chunksize=chunk_rows, on_bad_lines="warn",
+                         index_col=False)
+    for frame in chunks:
+        yield [frame[name].tolist() for name in names]
+
+def _iter_arrow_columns(filepath, delim, names, skip_header, block_size):
+    """pyarrow half of iter_delimited_columns.
+
+    Arrow cannot pad a short record itself, so the invalid-row handler pads it and files it
+    under its record number, and every block is merged back into file order. Arrow numbers
+    records (blank lines aside) only when parsing serially; turning the columns into Python
+    lists costs far more than parsing, so the threads bought little. The header is record 1,
+    dropped by number rather than with skip_rows, which counts blank lines too.
+    """
+    width = len(names)
+    # Record number -> padded record, or None for one that is not yielded
+    pending = {}
+    skipped = [0]
+
+    def handle(row):
+        if row.number == 1 and skip_header or not row.text.strip():
+            pending[row.number] = None
+        elif row.actual_columns < width:
+            record = next(csv.reader(io.StringIO(row.text), delimiter=delim), [])
+            pending[row.number] = record + [""] * (width - len(record))
+        else:
+            pending[row.number] = None
+            skipped[0] += 1
+        return "skip"
+
+    reader = pa_csv.open_csv(
+        filepath,
+        read_options=pa_csv.ReadOptions(column_names=names, block_size=block_size, use_threads=False),
+        parse_options=pa_csv.ParseOptions(delimiter=delim, newlines_in_values=True, invalid_row_handler=handle),
+        convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                              strings_can_be_null=False, quoted_strings_can_be_null=False),
+    )
+    number = 1
+    for batch in reader:
+        columns = [column.to_pylist() for column in batch.columns]
+        if number == 1 and skip_header and 1 not in pending:
+            columns = [column[1:] for column in columns]
+            number = 2
+        rows, placed, inserts = len(columns[0]), 0, []
+        # Handled records lying among (or right after) this block's rows, in file order
+        for record_number in sorted(pending):
+            gap = record_number - number
+            if placed + gap > rows:
+                break
+            placed += gap
+            number = record_number + 1
+            record = pending.pop(record_number)
+            if record is not None:
+                inserts.append((placed, record))
+        number += rows - placed
+        if inserts:
+            columns = _interleave(columns, inserts)
+        if columns[0]:
+            yield columns
+    if pending:
+        records = [pending[n] for n in sorted(pending) if pending[n] is not None]
+        if records:
+            yield [list(values) for values in zip(*records)]
+    if skipped[0]:
+        print(f"⚠️ Skipped {skipped[0]} records with more than {width} fields in {filepath}")
+
+def _interleave(columns, inserts):
+    """`columns` with each (i, record) of `inserts` placed before their row i."""
+    merged = [[] for _ in columns]
+    start = 0
+    for i, record in inserts:
+        for out, column, value in zip(merged, columns, record):
+            out.extend(column[start:i])
+            out.append(value)
+        start = i
+    for out, column in zip(merged, columns):
+        out.extend(column[start:])
+    return merged
@@ -0,0 +1,77 @@
+import json
+import hashlib
+import numpy as np
+from faker import Faker
+from sqlite_cache import SQLiteCache
+
+# Part of the cache key: bump whenever pool contents are produced differently
+POOL_FORMAT = 1
+
+def pool_size_for(rows, max_duplicates):
+    """Smallest power-of-two pool whose expected share of repeated values, over `rows` uniform
+    draws, stays within `max_duplicates`; `rows` when none does, as the pool is then used as is."""
+    size = 1024
+    while size < rows:
+        # E[distinct] of n draws from P values is P * (1 - (1 - 1/P)^n)
+        distinct = size * -np.expm1(rows * np.log1p(-1 / size))
+        if 1 - distinct / rows <= max_duplicates:
+            break
+        size *= 2
+    return min(size, max(rows, 1))
+
+# ------------ Faker Value Pools ------------
+class FakerPools:
+    """Per Faker method, `pool_size` values generated once and cached on disk, then sampled by index.
+
+    A pool is keyed by (locale, seed, method, size), so the same mapping reuses it across runs;
+    a column of any length is one vectorized draw of pool indices. Values that are not JSON
+    scalars (dates, decimals, ...) are pooled as their str().
+    """
+
+    def __init__(self, path="faker_pools.db", locale="en_US", seed=0, pool_size=10_000, max_entries=1_000):
+        self.locale = locale
+        self.seed = seed
+        self.pool_size = pool_size
+        self.store = SQLiteCache(path, max_entries)
+        self.faker = Faker(locale)
+        self.pools = {}
+        self.rng = np.random.default_rng(seed)
+
+    def key(self, method, size):
+        blob = json.dumps([POOL_FORMAT, self.locale, self.seed, method, size]).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def supports(self, method):
+        return bool(method) and not method.startswith("_") and callable(getattr(self.faker, method, None))
+
+    def pool(self, method, size=None):
+        size = size or self.pool_size
+        key = self.key(method, size)
+        if key not in self.pools:
+            values = self.store.get(key)
+            if values is None:
+                self.faker.seed_instance(f"{self.seed}:{method}")
+                provider = getattr(self.faker, method)
+                values = [_scalar(provider()) for _ in range(size)]
+                self.store.set(key, values)
+            self.pools[key] = np.array(values, dtype=object)
+        return self.pools[key]
+
+    def sample(self, method, n, max_duplicates=None):
+        """`n` values of `method`; with `max_duplicates` the pool grows until the expected share
+        of repeated values is at most that."""
+        size = max(self.pool_size, pool_size_for(n, max_duplicates)) if max_duplicates is not None else None
+        values = self.pool(method, size)
+        if len(values) >= n and max_duplicates is not None:
+            # Every pooled value at most once: only Faker's own repeats remain
+            return values[self.rng.permutation(len(values))[:n]]
+        return values[self.rng.integers(0, len(values), n)]
+
+    def flush(self):
+        self.store.flush()
+
+    def stats(self):
+        return self.store.stats()
+
+def _scalar(value):
+    return value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
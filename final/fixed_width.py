@@ -0,0 +1,141 @@
+import os
+import numpy as np
+import pandas as pd
+
+# ------------ Layout Inference ------------
+class FixedWidthLayout:
+    """Column spans of a fixed-width file, inferred from which character positions are ever used.
+
+    A position that is blank on every sample line separates columns, so an empty field
+    or a double space inside one value does not shift anything as long as some other
+    line fills that position.
+    """
+
+    def __init__(self, spans, aligns=None):
+        self.spans = [tuple(span) for span in spans]
+        self.aligns = aligns or ["left"] * len(self.spans)
+        # Cells tile the whole line so values wider than any sampled one still read in full:
+        # the gap after a column goes to it unless the next column is right-aligned (and
+        # grows leftwards into it); the last cell runs to the end of the line
+        self.bounds = [0]
+        for (_, end), (start, _), align, next_align in zip(self.spans, self.spans[1:], self.aligns, self.aligns[1:]):
+            if next_align == "left":
+                self.bounds.append(start)
+            else:
+                self.bounds.append((end + start) // 2 if align == "left" else end)
+        self.slices = [slice(a, b) for a, b in zip(self.bounds, self.bounds[1:])] + [slice(self.bounds[-1], None)]
+
+    @classmethod
+    def infer(cls, lines, min_gap=None):
+        """Layout for raw (unstripped) sample `lines`, or None if they hold fewer than two columns.
+
+        With few lines a single blank column is as likely to be a space inside a value as a
+        separator, so unless `min_gap` is given, gaps must be 2+ wide below 10 sample lines.
+        """
+        lines = [line.rstrip("\r\n") for line in lines if line.strip()]
+        if not lines:
+            return None
+        if min_gap is None:
+            min_gap = 1 if len(lines) >= 10 else 2
+        width = max(len(line) for line in lines)
+        grid = np.zeros((len(lines), width), dtype=bool)
+        for i, line in enumerate(lines):
+            codes = np.frombuffer(line.encode("utf-32-le"), dtype=np.uint32)
+            grid[i, :len(codes)] = codes != ord(" ")
+        used = np.flatnonzero(grid.any(axis=0))
+        breaks = np.flatnonzero(np.diff(used) > min_gap)
+        starts = np.concatenate(([used[0]], used[breaks + 1]))
+        ends = np.concatenate((used[breaks] + 1, [used[-1] + 1]))
+        if len(starts) < 2:
+            return None
+        # A column is right-aligned when its last position is filled more often than its first
+        aligns = ["right" if grid[:, e - 1].sum() > grid[:, s].sum() else "left" for s, e in zip(starts, ends)]
+        return cls(zip(starts.tolist(), ends.tolist()), aligns)
+
+    def split(self, line):
+        return [line[s].strip() for s in self.slices]
+
+    # ------------ Fast Column Reader ------------
+    def iter_columns(self, filepath, chunk_rows=50_000, skip_header=False):
+        """Column lists per chunk of rows, sliced straight out of a memory-mapped file when
+        every record has the same byte length; otherwise line by line."""
+        record = _record_length(filepath)
+        if record is None:
+            yield from self._iter_line_columns(filepath, chunk_rows, skip_header)
+            return
+        length, newline = record
+        data = np.memmap(filepath, dtype=np.uint8, mode="r")
+        records = data.reshape(-1, length)
+        width = length - newline
+        for begin in range(int(skip_header), len(records), chunk_rows):
+            raw = records[begin:begin + chunk_rows]
+            block = raw[:, :width]
+            if (block >= 128).any():
+                # Multi-byte characters make byte offsets differ from character offsets
+                lines = raw.tobytes().decode("utf-8").splitlines()
+                yield self._transpose([self.split(line) for line in lines])
+                continue
+            columns = []
+            for a, b in zip(self.bounds, self.bounds[1:] + [width]):
+                field = np.ascontiguousarray(block[:, a:b]).view(f"S{b - a}").ravel()
+                columns.append(np.char.strip(field.astype(f"U{b - a}")).tolist())
+            yield columns
+
+    def _iter_line_columns(self, filepath, chunk_rows, skip_header):
+        chunk = []
+        with open(filepath, "r") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if not line.strip():
+                    continue
+                if skip_header:
+                    skip_header = False
+                    continue
+                chunk.append(self.split(line))
+                if len(chunk) >= chunk_rows:
+                    yield self._transpose(chunk)
+                    chunk = []
+        if chunk:
+            yield self._transpose(chunk)
+
+    def _transpose(self, rows):
+        return [list(values) for values in zip(*rows)] if rows else [[] for _ in self.spans]
+
+    # ------------ Writer ------------
+    def format(self, columns):
+        """Text of one fixed-width line per row for equal-length value sequences, one per span.
+
+        Values are padded to their cell with the source alignment, and cut to leave one
+        trailing blank so neighbouring columns never run together.
+        """
+        lines = None
+        ends = self.bounds[1:] + [self.spans[-1][1]]
+        for i, (a, b, align, values) in enumerate(zip(self.bounds, ends, self.aligns, columns)):
+            last = i == len(self.spans) - 1
+            width = b - a if last else b - a - 1
+            text = pd.Series(values, dtype=object).astype(str)
+            if not last:
+                text = text.str.slice(0, width)
+            text = text.str.rjust(width) if align == "right" else text.str.ljust(width)
+            part = text if last else text + " "
+            lines = part if lines is None else lines + part
+        return "".join(line + "\n" for line in lines) if lines is not None else ""
+
+    def to_dict(self):
+        return {"spans": [list(span) for span in self.spans], "aligns": self.aligns}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["spans"], data["aligns"])
+
+def _record_length(filepath):
+    """(bytes per record, newline bytes) when the file is a whole number of equal-length,
+    newline-terminated records; None otherwise."""
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        first = f.readline()
+    if not first.endswith(b"\n") or size % len(first):
+        return None
+    newline = 2 if first.endswith(b"\r\n") else 1
+    ends = np.memmap(filepath, dtype=np.uint8, mode="r").reshape(-1, len(first))[:, -1]
+    return (len(first), newline) if (ends == ord("\n")).all() else None
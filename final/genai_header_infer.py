@@ -1,6 +1,7 @@
 import json
 import difflib
 import requests
+from minhash import value_profile
 
 def call_genai_prompt(sample_rows):
     prompt = f"""You are a helpful assistant that understands tabular data. Based on the rows below, infer what each column likely represents.
@@ -46,9 +47,10 @@ def infer_headers_using_genai(sample_rows, kb):
         # 1️⃣ Try value set similarity
         value_match = None
         best_val_score = 0
-        for kb_col, counter in kb.value_sets.items():
-            kb_vals = ' '.join(list(counter.keys())[:10]).lower()
-            input_vals = ' '.join(col_values_clean)
+        input_vals = ' '.join(col_values_clean)
+        candidates = kb.value_index.query(input_vals)
+        for kb_col in sorted(candidates, key=lambda c: kb.alias_index.order.get(c, len(candidates))):
+            kb_vals = value_profile(kb.value_sets[kb_col]).lower()
             score = difflib.SequenceMatcher(None, input_vals, kb_vals).ratio()
             if score > best_val_score:
                 best_val_score = score
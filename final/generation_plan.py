@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+from datetime import date
+from sampling import build_alias_table
+from numeric_stats import QuantileSketch
+from date_stats import unit_for
+from templates import looks_structured, template_space
+
+# Bump when the spec layout changes so stale cached plans are not reused
+PLAN_FORMAT = 6
+# Cached plans kept on disk; the least recently used beyond this are deleted
+PLAN_CACHE_ENTRIES = 256
+
+# ------------ Column Compilation ------------
+def compile_quantiles(stats, decimals):
+    """Piecewise-uniform inverse CDF over the learned sketch's buckets, clipped to the seen range."""
+    lo, hi, counts = QuantileSketch.from_dict(stats["sketch"]).buckets()
+    return {"kind": "quantile", "lo": lo.tolist(), "hi": hi.tolist(), "cdf": counts.cumsum().tolist(),
+            "low": stats["min"], "high": stats["max"], "decimals": decimals}
+
+def compile_dates(dates):
+    """Uniform dates (or timestamps) over the learned range, written in the most common format."""
+    if not dates:
+        return {"kind": "date", "low": "1970-01-01", "high": date.today().isoformat(), "unit": "D",
+                "format": "%Y-%m-%d"}
+    fmt = max(dates["formats"], key=dates["formats"].get)
+    unit = unit_for(fmt)
+    low, high = (dates["min"], dates["max"]) if unit == "s" else (dates["min"][:10], dates["max"][:10])
+    return {"kind": "date", "low": low, "high": high, "unit": unit, "format": fmt}
+
+def compile_templates(templates):
+    """Character-class templates drawn by learned frequency, filled with random characters."""
+    values, counts = zip(*templates.items())
+    prob, alias = build_alias_table(counts)
+    return {"kind": "template", "templates": list(values), "prob": prob.tolist(), "alias": alias.tolist()}
+
+def compile_column(kb, col, records=None):
+    """Generation spec for `col`; `records` is how many rows the plan must be able to produce."""
+    patterns = kb.patterns.get(col, [])
+    stats = kb.stats.get(col, {})
+    # Only code-like columns are filled from templates; free text replays learned values
+    templates = kb.templates.get(col) if looks_structured(kb.templates.get(col)) else None
+
+    if col in kb.uniques:
+        if "int" in patterns:
+            low = int(stats.get("min", 1000))
+            digits = int(stats.get("max_length", len(str(low))))
+            return {"kind": "unique", "strategy": "counter", "start": low, "low": low, "high": 10 ** digits - 1}
+        template = max(templates, key=templates.get) if templates else None
+        if "text" in patterns and template and template_space(template) >= (records or 0):
+            # The dominant shape, filled so that no two rows repeat; too small a shape gets uuids
+            return {"kind": "unique", "strategy": "template", "template": template}
+        if "text" in patterns:
+            return {"kind": "unique", "strategy": "uuid"}
+
+    if stats.get("count") and ("int" in patterns or "float" in patterns):
+        return compile_quantiles(stats, 0 if "int" in patterns else 2)
+    if "int" in patterns:
+        return {"kind": "int", "low": int(stats.get("min", 1000)), "high": int(stats.get("max", 9999))}
+    if "float" in patterns:
+        return {"kind": "float", "mu": stats.get("mean", 100.0), "sigma": stats.get("std", 10.0)}
+    if "date" in patterns:
+        return compile_dates(kb.dates.get(col))
+    if "boolean" in patterns:
+        return {"kind": "choice", "values": ["Yes", "No"]}
+    if "text" in patterns and templates:
+        return compile_templates(templates)
+
+    counter = kb.value_sets.get(col)
+    if counter:
+        values, counts = zip(*counter.items())
+        prob, alias = build_alias_table(counts)
+        return {"kind": "choice", "values": list(values), "prob": prob.tolist(), "alias": alias.tolist()}
+    return {"kind": "word"}
+
+def kb_version(kb, columns, records=None):
+    """Hash of the KB's identity and every input a plan for `columns` (of `records` rows) depends on."""
+    state = [PLAN_FORMAT, os.path.abspath(kb.path), records]
+    for col in columns:
+        counter = kb.value_sets.get(col)
+        state.append([
+            col,
+            sorted(kb.patterns.get(col, [])),
+            kb.stats.get(col, {}),
+            kb.dates.get(col),
+            kb.templates.get(col),
+            col in kb.uniques,
+            sorted(counter.items()) if counter else [],
+        ])
+    blob = json.dumps(state, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+def evict_plans(cache_dir, max_entries):
+    """Delete all but the `max_entries` most recently used plans in `cache_dir`."""
+    paths = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith(".json")]
+    if len(paths) <= max_entries:
+        return
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[max_entries:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # another run evicted it first
+            pass
+
+# ------------ Generation Plan ------------
+class GenerationPlan:
+    def __init__(self, version, columns):
+        self.version = version
+        self.columns = columns
+
+    def __getitem__(self, col):
+        return self.columns[col]
+
+    @classmethod
+    def compile(cls, kb, columns, records=None):
+        columns = list(dict.fromkeys(columns))
+        return cls(kb_version(kb, columns, records), {col: compile_column(kb, col, records) for col in columns})
+
+    @classmethod
+    def for_columns(cls, kb, columns, cache_dir="plan_cache", records=None, max_entries=PLAN_CACHE_ENTRIES):
+        columns = list(dict.fromkeys(columns))
+        version = kb_version(kb, columns, records)
+        path = os.path.join(cache_dir, f"{version}.json") if cache_dir else None
+        if path and os.path.exists(path):
+            # Mark as recently used so eviction keeps it
+            os.utime(path)
+            return cls.load(path)
+        plan = cls(version, {col: compile_column(kb, col, records) for col in columns})
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            plan.save(path)
+            evict_plans(cache_dir, max_entries)
+        return plan
+
+    def to_dict(self):
+        return {"version": self.version, "columns": self.columns}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["version"], data["columns"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
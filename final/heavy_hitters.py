@@ -0,0 +1,76 @@
+from collections import Counter
+from collections.abc import Mapping
+from operator import itemgetter
+
+DEFAULT_BUDGET = 1_000
+
+# ------------ Space-Saving ------------
+class SpaceSaving:
+    """Fixed-capacity heavy-hitter summary (Space-Saving), read like the Counter it replaces.
+
+    Batches are merged in as exact summaries: a value not being tracked starts from the
+    smallest tracked count (0 until the summary is full), and the `capacity` largest counts
+    are kept. Every tracked count overestimates the true one by at most errors[value], and
+    any value that was dropped occurred no more often than the smallest tracked count.
+    """
+
+    def __init__(self, capacity=DEFAULT_BUDGET):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def update(self, values):
+        counts = values if isinstance(values, Mapping) else Counter(values)
+        floor = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        for value, n in counts.items():
+            if value in self.counts:
+                self.counts[value] += n
+            else:
+                self.counts[value] = floor + n
+                if floor:
+                    self.errors[value] = floor
+        if len(self.counts) > self.capacity:
+            self._trim()
+        return self
+
+    def _trim(self):
+        # Stable sort keeps earlier values on ties; survivors keep their insertion order
+        kept = {v for v, _ in sorted(self.counts.items(), key=itemgetter(1), reverse=True)[:self.capacity]}
+        self.counts = {v: c for v, c in self.counts.items() if v in kept}
+        self.errors = {v: e for v, e in self.errors.items() if v in kept}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, value):
+        return value in self.counts
+
+    def __getitem__(self, value):
+        return self.counts.get(value, 0)
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def keys(self):
+        return self.counts.keys()
+
+    def items(self):
+        return self.counts.items()
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def most_common(self, n=None):
+        return sorted(self.counts.items(), key=itemgetter(1), reverse=True)[:n]
+
+class HeavyHitterSets(dict):
+    """column -> SpaceSaving, created on first access with that column's budget."""
+
+    def __init__(self, budget=DEFAULT_BUDGET, budgets=None):
+        super().__init__()
+        self.budget = budget
+        self.budgets = budgets or {}
+
+    def __missing__(self, column):
+        self[column] = SpaceSaving(self.budgets.get(column, self.budget))
+        return self[column]
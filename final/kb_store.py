@@ -0,0 +1,404 @@
+import os
+import sys
+import json
+import zlib
+import sqlite3
+from contextlib import contextmanager
+import numpy as np
+from collections import defaultdict
+from alias_index import AliasIndex
+from heavy_hitters import HeavyHitterSets, SpaceSaving, DEFAULT_BUDGET
+from cardinality import HyperLogLog, looks_unique, revise_patterns
+from minhash import MinHashLSH, signature, value_profile
+from numeric_stats import NumericStats
+from date_stats import DateStats
+from templates import TEMPLATE_BUDGET
+from profiler import ColumnProfile
+
+# ------------ Lazy Column Containers ------------
+class LazyColumns:
+    """Mixin for per-column KB maps: any lookup first lets `touch` pull that column from disk."""
+
+    touch = staticmethod(lambda column: None)
+
+    def __getitem__(self, column):
+        self.touch(column)
+        return super().__getitem__(column)
+
+    def get(self, column, default=None):
+        self.touch(column)
+        return super().get(column, default)
+
+    def __contains__(self, column):
+        self.touch(column)
+        return super().__contains__(column)
+
+    def setdefault(self, column, default=None):
+        self.touch(column)
+        return super().setdefault(column, default)
+
+class LazyDict(LazyColumns, defaultdict):
+    pass
+
+class LazyHeavyHitterSets(LazyColumns, HeavyHitterSets):
+    pass
+
+class LazySet(set):
+    touch = staticmethod(lambda column: None)
+
+    def __contains__(self, column):
+        self.touch(column)
+        return super().__contains__(column)
+
+# ------------ SQLite Store ------------
+# Deltas are folded into the column rows once this many have piled up
+COMPACT_AFTER = 500
+
+def _pack(obj):
+    return zlib.compress(json.dumps(obj).encode("utf-8"))
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+def _sig_bytes(sig):
+    return None if sig is None else np.asarray(sig, dtype="<u8").tobytes()
+
+class KBStore:
+    """Column rows plus an append-only delta log in one SQLite database.
+
+    kb_columns holds one compacted row per column: aliases and MinHash signature in the
+    clear, everything else in a zlib-compressed JSON record read only when the column is
+    first used. Runs never rewrite those rows; `append` adds what a run learned to
+    kb_deltas (aliases it added and a mergeable ColumnProfile), and readers fold a
+    column's deltas over its row. `compact` folds the whole log into the rows.
+
+    WAL mode lets readers proceed while one process writes, and every write happens in a
+    BEGIN IMMEDIATE transaction, so concurrent runs queue on SQLite's lock for the length
+    of one commit instead of overwriting each other.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS kb_columns ("
+            "name TEXT PRIMARY KEY, aliases TEXT, signature BLOB, record BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS kb_deltas ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, aliases TEXT, signature BLOB, profile BLOB)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS kb_deltas_name ON kb_deltas (name, id)")
+
+    @contextmanager
+    def transaction(self, mode="IMMEDIATE"):
+        """Writes take the database write lock up front; DEFERRED gives a consistent read snapshot."""
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute(f"BEGIN {mode}")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def names(self):
+        """(name, aliases or None) for every column in rows or deltas, in first-seen order."""
+        names = {}
+        with self.transaction("DEFERRED"):
+            rows = self.conn.execute("SELECT name, aliases FROM kb_columns ORDER BY rowid").fetchall()
+            rows += self.conn.execute("SELECT name, aliases FROM kb_deltas ORDER BY id").fetchall()
+        for name, aliases in rows:
+            known = names.setdefault(name, None)
+            if aliases is not None:
+                names[name] = list(dict.fromkeys((known or []) + json.loads(aliases)))
+        return list(names.items())
+
+    def signatures(self):
+        """Latest signature per column: the newest delta's if it has one, else the row's."""
+        with self.transaction("DEFERRED"):
+            rows = self.conn.execute(
+                "SELECT name, signature FROM kb_columns WHERE signature IS NOT NULL ORDER BY rowid").fetchall()
+            rows += self.conn.execute(
+                "SELECT name, signature FROM kb_deltas WHERE signature IS NOT NULL ORDER BY id").fetchall()
+        return {name: np.frombuffer(sig, dtype="<u8").astype(np.uint64) for name, sig in rows}
+
+    def record(self, name):
+        """(compacted record or None, [delta profiles in log order]) read from one snapshot."""
+        with self.transaction("DEFERRED"):
+            row = self.conn.execute("SELECT record FROM kb_columns WHERE name = ?", (name,)).fetchone()
+            deltas = self.conn.execute(
+                "SELECT profile FROM kb_deltas WHERE name = ? AND profile IS NOT NULL ORDER BY id", (name,)).fetchall()
+        return (_unpack(row[0]) if row else None), [_unpack(blob) for blob, in deltas]
+
+    def append(self, rows):
+        """Log (name, added aliases, signature, profile dict) rows in one transaction."""
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO kb_deltas (name, aliases, signature, profile) VALUES (?, ?, ?, ?)",
+                [(name, None if aliases is None else json.dumps(aliases), _sig_bytes(sig),
+                  None if profile is None else _pack(profile))
+                 for name, aliases, sig, profile in rows],
+            )
+
+    def pending(self):
+        return self.conn.execute("SELECT COUNT(*) FROM kb_deltas").fetchone()[0]
+
+    def delta_names(self):
+        return [name for name, in self.conn.execute("SELECT DISTINCT name FROM kb_deltas")]
+
+    def write(self, rows):
+        """Upsert compacted (name, aliases, signature, record) rows; a None signature keeps the stored one."""
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO kb_columns (name, aliases, signature, record) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET aliases = excluded.aliases, "
+                "signature = COALESCE(excluded.signature, kb_columns.signature), record = excluded.record",
+                [(name, None if aliases is None else json.dumps(aliases), _sig_bytes(sig), _pack(record))
+                 for name, aliases, sig, record in rows],
+            )
+
+    def clear_deltas(self):
+        self.conn.execute("DELETE FROM kb_deltas")
+
+    def is_empty(self):
+        return not self.conn.execute("SELECT EXISTS (SELECT 1 FROM kb_columns) OR EXISTS (SELECT 1 FROM kb_deltas)"
+                                     ).fetchone()[0]
+
+    def import_json(self, json_path):
+        """Load a knowledge_base.json into an empty store; returns the number of columns imported.
+
+        Checked and written under the write lock, so concurrent first runs import it once.
+        """
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        columns = data.get("columns", {})
+        value_sets = data.get("value_sets", {})
+        signatures = data.get("signatures", {})
+        uniques = set(data.get("uniques", []))
+        names = list(dict.fromkeys([*columns, *data.get("patterns", {}), *value_sets, *data.get("stats", {})]))
+        rows = []
+        for name in names:
+            sig = signatures.get(name)
+            if sig is None and value_sets.get(name):
+                sig = signature(value_profile(value_sets[name]))
+            rows.append((name, columns.get(name), sig, {
+                "patterns": data.get("patterns", {}).get(name, []),
+                "value_sets": value_sets.get(name, {}),
+                "value_errors": data.get("value_errors", {}).get(name, {}),
+                "stats": data.get("stats", {}).get(name, {}),
+                "unique": name in uniques,
+                "cardinality": data.get("cardinality", {}).get(name),
+                "dates": data.get("dates", {}).get(name),
+                "templates": data.get("templates", {}).get(name),
+            }))
+        with self.transaction():
+            if not self.is_empty():
+                return 0
+            self.write(rows)
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
+
+def migrate_json(json_path, db_path):
+    """One-shot copy of a knowledge_base.json into the SQLite format; returns the column count."""
+    store = KBStore(db_path)
+    count = store.import_json(json_path)
+    store.close()
+    return count
+
+# ------------ Knowledge Base ------------
+class KnowledgeStore:
+    """Knowledge base state shared by both pipelines, persisted in a KBStore.
+
+    Names and aliases load up front; each column's patterns, values, stats and sketches load
+    on first access, the alias and MinHash indexes on first use. `save` appends only what
+    this run learned (merged ColumnProfiles and new aliases) to the store's delta log, so
+    parallel runs never lose each other's updates. A new header name is matched to an
+    existing column by exact alias in `match_column`, which subclasses may loosen.
+    """
+
+    def __init__(self, path="knowledge_base.db", legacy_path="knowledge_base.json", value_budget=DEFAULT_BUDGET,
+                 value_budgets=None, store=None):
+        self.path = path
+        # Per-column cap on remembered values; value_budgets overrides it for named columns
+        self.value_budget = value_budget
+        self.value_budgets = value_budgets or {}
+        self.store = store or KBStore(path)
+        if legacy_path and os.path.exists(legacy_path) and self.store.is_empty():
+            imported = self.store.import_json(legacy_path)
+            if imported:
+                print(f"🔁 Migrated {imported} columns from {legacy_path} to {path}")
+        self.load()
+
+    def load(self):
+        self.columns = defaultdict(list)
+        self.patterns = LazyDict(list)
+        self.value_sets = LazyHeavyHitterSets(self.value_budget, self.value_budgets)
+        self.stats = LazyDict(dict)
+        self.uniques = LazySet()
+        self.cardinality = LazyDict(None)
+        self.dates = LazyDict(dict)
+        self.templates = LazyDict(dict)
+        for container in (self.patterns, self.value_sets, self.stats, self.uniques, self.cardinality, self.dates,
+                          self.templates):
+            container.touch = self._touch
+        self.unloaded = set()
+        self.dirty = set()
+        self.learned = {}
+        self.new_aliases = defaultdict(list)
+        self.signatures = {}
+        self._alias_index = None
+        self._value_index = None
+        for name, aliases in self.store.names():
+            self.unloaded.add(name)
+            if aliases is not None:
+                self.columns[name] = aliases
+
+    def _touch(self, column):
+        if column not in self.unloaded:
+            return
+        self.unloaded.discard(column)
+        record, deltas = self.store.record(column)
+        if record:
+            self.patterns[column] = record["patterns"]
+            if record["value_sets"]:
+                summary = SpaceSaving(self.value_budgets.get(column, self.value_budget)).update(record["value_sets"])
+                summary.errors.update({v: e for v, e in record["value_errors"].items() if v in summary})
+                self.value_sets[column] = summary
+            if record["stats"]:
+                self.stats[column] = record["stats"]
+            if record["unique"]:
+                self.uniques.add(column)
+            if record["cardinality"]:
+                self.cardinality[column] = HyperLogLog.from_dict(record["cardinality"])
+            if record.get("dates"):
+                self.dates[column] = record["dates"]
+            if record.get("templates"):
+                self.templates[column] = record["templates"]
+        for delta in deltas:
+            self._apply(column, ColumnProfile.from_dict(delta))
+
+    def _record(self, column):
+        self._touch(column)
+        cardinality = self.cardinality.get(column)
+        summary = self.value_sets.get(column)
+        return {
+            "patterns": self.patterns.get(column, []),
+            "value_sets": dict(summary.items()) if summary else {},
+            "value_errors": summary.errors if summary else {},
+            "stats": self.stats.get(column, {}),
+            "unique": column in self.uniques,
+            "cardinality": cardinality.to_dict() if cardinality else None,
+            "dates": self.dates.get(column),
+            "templates": self.templates.get(column),
+        }
+
+    @property
+    def alias_index(self):
+        if self._alias_index is None:
+            self._alias_index = AliasIndex.build(self.columns)
+        return self._alias_index
+
+    @property
+    def value_index(self):
+        if self._value_index is None:
+            self._value_index = MinHashLSH.from_dict({**self.store.signatures(), **self.signatures})
+        return self._value_index
+
+    def save(self):
+        rows = []
+        for col in self.dirty:
+            profile = self.learned.get(col)
+            rows.append((col, self.new_aliases.get(col), self.signatures.get(col) if profile else None,
+                         profile.to_dict() if profile else None))
+        self.store.append(rows)
+        self.dirty.clear()
+        self.learned.clear()
+        self.new_aliases.clear()
+        if self.store.pending() >= COMPACT_AFTER:
+            self.compact()
+
+    def compact(self):
+        """Fold the whole delta log into the column rows under the write lock."""
+        with self.store.transaction():
+            # A fresh view of the same store sees every row with its deltas applied
+            folded = type(self)(self.path, None, self.value_budget, self.value_budgets, store=self.store)
+            rows = []
+            for col in self.store.delta_names():
+                record = folded._record(col)
+                summary = folded.value_sets.get(col)
+                sig = signature(value_profile(summary)) if summary else None
+                rows.append((col, folded.columns[col] if col in folded.columns else None, sig, record))
+            self.store.write(rows)
+            self.store.clear_deltas()
+        print(f"🗜️ Compacted {len(rows)} KB columns")
+
+    def match_column(self, name):
+        """Canonical column for header `name`: an exact (normalized) alias match by default."""
+        return self.alias_index.lookup(name)
+
+    def add_column(self, name):
+        canon = self.match_column(name)
+        if canon:
+            if name not in self.columns[canon]:
+                self.columns[canon].append(name)
+                self.alias_index.add(canon, name)
+                self.new_aliases[canon].append(name)
+                self.dirty.add(canon)
+            return canon
+        self.columns[name].append(name)
+        self.alias_index.add(name, name)
+        self.new_aliases[name].append(name)
+        self.dirty.add(name)
+        return name
+
+    def update_patterns(self, column, values):
+        profile = ColumnProfile()
+        profile.update(values)
+        self.merge_profile(column, profile)
+
+    def merge_profile(self, column, profile):
+        self._apply(column, profile)
+        self.dirty.add(column)
+        budget = self.value_budgets.get(column, self.value_budget)
+        self.learned.setdefault(column, ColumnProfile(budget)).merge(profile)
+
+    def _apply(self, column, profile):
+        sketch = self.cardinality.setdefault(column, HyperLogLog()).merge(profile.distinct)
+        patterns = profile.patterns()
+        self.patterns[column] = revise_patterns(self.patterns[column], patterns, sketch)
+        self.value_sets[column].update(profile.values.counts)
+        sig = signature(value_profile(self.value_sets[column]))
+        self.signatures[column] = sig
+        if self._value_index is not None:
+            self._value_index.set_signature(column, sig)
+
+        # Re-decided over everything learned, so a later file with repeats revokes uniqueness
+        if profile.is_unique() and looks_unique(sketch):
+            self.uniques.add(column)
+        else:
+            self.uniques.discard(column)
+
+        if ("int" in patterns or "float" in patterns) and profile.numeric.count:
+            # Merge into what earlier runs learned instead of overwriting it
+            learned = NumericStats.from_dict(self.stats[column])
+            self.stats[column] = learned.merge(profile.numeric).to_dict()
+
+        if profile.templates:
+            summary = SpaceSaving(TEMPLATE_BUDGET).update(self.templates.get(column) or {})
+            self.templates[column] = summary.update(profile.templates.counts).counts
+
+        if profile.dates.count:
+            learned = DateStats.from_dict(self.dates.get(column))
+            self.dates[column] = learned.merge(profile.dates).to_dict()
+
+# ------------ Run ------------
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "knowledge_base.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else "knowledge_base.db"
+    print(f"✅ Migrated {migrate_json(source, target)} columns from {source} to {target}")
@@ -1,154 +1,101 @@
 import os
-import re
-import json
-import pandas as pd
-from collections import defaultdict, Counter
-from statistics import mean, stdev
 from genai_header_infer import infer_headers_using_genai
-from mock_generator import MockDataGenerator
-
-# ------------ Pattern Detection ------------
-class PatternEngine:
-    @staticmethod
-    def infer(values):
-        if not values: return ["text"]
-        if all(re.fullmatch(r"\d+", v) for v in values): return ["int"]
-        if all(re.fullmatch(r"\d+\.\d{2}", v) for v in values): return ["float"]
-        if all(re.fullmatch(r"\d{4}[-/]\d{2}[-/]\d{2}", v) for v in values): return ["date"]
-        if all(v.lower() in ["yes", "no", "true", "false", "y", "n"] for v in values): return ["boolean"]
-        return ["categorical"] if len(set(values)) < 20 else ["text"]
+from mock_generator import MockDataGenerator, write_csv_sharded
+from generation_plan import GenerationPlan
+from profiler import ColumnProfile, sniff, read_rows, profile_file, sample_rows
+from kb_store import KnowledgeStore
+from fixed_width import FixedWidthLayout
+from profile_cache import ProfileCache
 
 # ------------ Knowledge Base ------------
-class KnowledgeBase:
-    def __init__(self, path="knowledge_base.json"):
-        self.path = path
-        self.columns = defaultdict(list)
-        self.patterns = defaultdict(list)
-        self.value_sets = defaultdict(Counter)
-        self.stats = defaultdict(dict)
-        self.uniques = set()
-        self.load()
-
-    def load(self):
-        if os.path.exists(self.path):
-            with open(self.path, "r") as f:
-                data = json.load(f)
-                self.columns = defaultdict(list, data.get("columns", {}))
-                self.patterns = defaultdict(list, data.get("patterns", {}))
-                self.value_sets = defaultdict(Counter, {k: Counter(v) for k, v in data.get("value_sets", {}).items()})
-                self.stats = defaultdict(dict, data.get("stats", {}))
-                self.uniques = set(data.get("uniques", []))
-
-    def save(self):
-        with open(self.path, "w") as f:
-            json.dump({
-                "columns": self.columns,
-                "patterns": self.patterns,
-                "value_sets": {k: dict(v) for k, v in self.value_sets.items()},
-                "stats": self.stats,
-                "uniques": list(self.uniques)
-            }, f, indent=2)
-
-    def add_column(self, name):
-        canon = self.get_canonical(name)
-        if canon:
-            if name not in self.columns[canon]:
-                self.columns[canon].append(name)
-            return canon
-        self.columns[name].append(name)
-        return name
-
+class KnowledgeBase(KnowledgeStore):
     def get_canonical(self, name):
-        for canon, aliases in self.columns.items():
-            if name.lower() == canon.lower() or name.lower() in [a.lower() for a in aliases]:
-                return canon
-        return None
-
-    def update_patterns(self, column, values):
-        values = [v for v in values if v]
-        patterns = PatternEngine.infer(values)
-        self.patterns[column] = list(set(self.patterns[column] + patterns))
-        self.value_sets[column].update(values)
-
-        if len(set(values)) == len(values):
-            self.uniques.add(column)
-
-        if "int" in patterns or "float" in patterns:
-            nums = [float(v) for v in values if re.match(r"^\d+(\.\d+)?$", v)]
-            if nums:
-                self.stats[column] = {
-                    "min": min(nums),
-                    "max": max(nums),
-                    "mean": mean(nums),
-                    "std": stdev(nums) if len(nums) > 1 else 0,
-                    "max_length": max(len(str(int(n))) for n in nums)
-                }
+        return self.match_column(name)
 
 # ------------ Smart Delimiter + Header Detection ------------
 def smart_detect_and_split(filepath):
-    with open(filepath, "r") as f:
-        lines = [line.strip() for line in f if line.strip()]
-
-    if not lines:
-        return None, False, []
-
-    for delim in [",", "|", "\t"]:
-        row1 = lines[0].split(delim)
-        if len(row1) > 1:
-            row2 = lines[1].split(delim) if len(lines) > 1 else []
-            is_text = lambda x: bool(re.fullmatch(r"[A-Za-z_][\w\s]*", x))
-            is_num = lambda x: bool(re.fullmatch(r"\d+(\.\d+)?", x))
-            header = (
-                len(row2) > 0 and 
-                sum(is_text(c.strip()) for c in row1) / len(row1) > 0.5 and
-                sum(is_num(c.strip()) for c in row2) / len(row2) > 0.3
-            )
-            parsed = [line.split(delim) for line in lines]
-            return delim, header, parsed
-
-    # Fallback: space-separated (only if no other delimiter works)
-    if re.search(r"\s{2,}", lines[0]):
-        rows = [re.split(r"\s{2,}", line.strip()) for line in lines]
-        return None, False, rows
-
-    return None, False, []
+    """detect_layout for the whole file: sniffed from a prefix, then every row read natively."""
+    delim, has_header, rows = sniff(filepath)
+    if not rows:
+        return delim, has_header, rows
+    body = read_rows(filepath, delim, skip_header=has_header)
+    return delim, has_header, rows[:1] + body if has_header else body
 
 # ------------ Main Pipeline ------------
-def run_pipeline(input_file, output_file, record_count):
+def run_pipeline(input_file, output_file, record_count, batch_size=100_000, shards=1, seed=None, unique_ints=None,
+                 random_access=False, resume=False, chunk_rows=50_000, output_format="csv", sample_budget=10_000,
+                 stratify=False, prefix_bytes=1 << 16):
+    """Learn `input_file` into the KB, then write `record_count` mock rows to `output_file`.
+
+    Types are inferred from a per-column reservoir of `sample_budget` values (stratified by
+    character-class template when `stratify` is set), which also feeds the GenAI header prompt.
+    The layout is sniffed from the first `prefix_bytes` of the file.
+    output_format="fixed" writes the rows in the input's own fixed-width layout.
+    Returns the header names and the GenerationPlan the rows were drawn from.
+    """
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Input file {input_file} not found")
 
-    delim, has_header, rows = smart_detect_and_split(input_file)
-    if not rows:
-        print("❌ Could not find delimiter or parse rows")
-        return
-
     kb = KnowledgeBase()
-    if has_header:
-        final_headers = rows[0]
-        print(f"✅ Detected headers: {final_headers}")
-        for i, col in enumerate(final_headers):
-            col_vals = [r[i] for r in rows[1:] if i < len(r)]
-            canon = kb.add_column(col)
-            kb.update_patterns(canon, col_vals)
+    profile_cache = ProfileCache()
+    # Same bytes learned into the same KB with the same settings: reuse that result instead of counting it twice
+    cache_key = profile_cache.key(input_file, kb=os.path.abspath(kb.path), sample_budget=sample_budget,
+                                  stratify=stratify, prefix_bytes=prefix_bytes)
+    cached = profile_cache.get(cache_key)
+    if cached:
+        final_headers = cached["headers"]
+        layout = cached["layout"]
+        print(f"♻️ {input_file} unchanged since it was last learned; skipping profiling")
+        for col, canon, profile in zip(final_headers, cached["columns"], cached["profiles"]):
+            if canon not in kb.columns:
+                kb.merge_profile(kb.add_column(col), profile)
         kb.save()
-        print("✅ Knowledge base updated with header values.")
     else:
-        print("🔍 No headers found. Invoking GenAI to infer headers...")
-        sample_rows = rows[:3]
-        final_headers = infer_headers_using_genai(sample_rows, kb)
-        for i, col in enumerate(final_headers):
-            col_vals = [r[i] for r in rows if i < len(r)]
-            canon = kb.add_column(col)
-            kb.update_patterns(canon, col_vals)
+        # Layout comes from a bounded prefix; the full file is then profiled chunk by chunk
+        delim, has_header, rows = sniff(input_file, prefix_bytes)
+        if not rows:
+            print("❌ Could not find delimiter or parse rows")
+            return
+
+        layout = delim if isinstance(delim, FixedWidthLayout) else None
+        profiles = profile_file(input_file, delim, has_header, chunk_rows, kb.value_budget,
+                                sample_budget=sample_budget, stratify=stratify)
+        if has_header:
+            final_headers = rows[0]
+            print(f"✅ Detected headers: {final_headers}")
+        else:
+            print("🔍 No headers found. Invoking GenAI to infer headers...")
+            final_headers = infer_headers_using_genai(sample_rows(profiles, 3), kb)
+        profiles += [ColumnProfile() for _ in range(len(final_headers) - len(profiles))]
+        columns = []
+        for col, profile in zip(final_headers, profiles):
+            columns.append(kb.add_column(col))
+            kb.merge_profile(columns[-1], profile)
         kb.save()
-        print("✅ Knowledge base updated using GenAI inferred headers.")
+        profile_cache.set(cache_key, final_headers, columns, profiles[:len(final_headers)], layout)
+        if has_header:
+            print("✅ Knowledge base updated with header values.")
+        else:
+            print("✅ Knowledge base updated using GenAI inferred headers.")
+    profile_cache.flush()
+    stats = profile_cache.stats()
+    print(f"ℹ️ Profile cache: {stats['hits']} hits, {stats['misses']} misses")
 
     print(f"📦 Generating {record_count} mock records...")
-    generator = MockDataGenerator(kb, record_count)
-    mock_data = generator.generate(final_headers)
-    pd.DataFrame(mock_data)[final_headers].to_csv(output_file, index=False)
+    if output_format == "fixed":
+        if layout is None:
+            raise ValueError(f"{input_file} is not fixed-width, so there is no layout to write")
+        generator = MockDataGenerator(kb, record_count, seed, unique_ints=unique_ints, random_access=random_access)
+        generator.write_fixed_width(final_headers, output_file, layout, batch_size)
+    elif shards > 1:
+        write_csv_sharded(kb, final_headers, output_file, record_count, shards, seed,
+                          batch_size=batch_size, unique_ints=unique_ints, random_access=random_access)
+    else:
+        generator = MockDataGenerator(kb, record_count, seed, unique_ints=unique_ints, random_access=random_access)
+        generator.write_csv(final_headers, output_file, batch_size, resume=resume)
     print(f"✅ Mock data written to {output_file}")
+    # Unchanged KB, so this is the cached plan the writer just used
+    return final_headers, GenerationPlan.for_columns(kb, final_headers, records=record_count)
 
 # ------------ Run ------------
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import hashlib
+import itertools
+import numpy as np
+from collections import defaultdict
+from counter_rng import mix64
+
+NUM_PERM = 64
+SEEDS = np.array([int.from_bytes(hashlib.blake2b(str(i).encode(), digest_size=8).digest(), "big")
+                  for i in range(NUM_PERM)], dtype=np.uint64)
+EMPTY = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+def value_profile(counter, k=10):
+    """The string value matching compares: a column's first `k` known values."""
+    return " ".join(itertools.islice(counter.keys(), k))
+
+def shingles(text, size=3):
+    text = text.lower()
+    if len(text) < size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def signature(text):
+    grams = shingles(text)
+    if not grams:
+        return EMPTY.copy()
+    hashed = np.array([int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+                       for g in grams], dtype=np.uint64)
+    return mix64(hashed[:, None] ^ SEEDS[None, :]).min(axis=0)
+
+class MinHashLSH:
+    """Banded LSH over MinHash signatures of KB column value profiles.
+
+    32 bands of 2 rows put the 50% recall point near a 3-gram Jaccard of 0.15, so
+    columns similar enough to pass the SequenceMatcher thresholds are virtually always
+    candidates while unrelated columns rarely are.
+    """
+
+    def __init__(self, bands=32, rows=2):
+        self.bands = bands
+        self.rows = rows
+        self.signatures = {}
+        self.buckets = defaultdict(set)
+
+    def _band_keys(self, sig):
+        return [(b, sig[b * self.rows:(b + 1) * self.rows].tobytes()) for b in range(self.bands)]
+
+    def update(self, key, text):
+        self.set_signature(key, signature(text))
+
+    def set_signature(self, key, sig):
+        sig = np.asarray(sig, dtype=np.uint64)
+        old = self.signatures.get(key)
+        if old is not None:
+            if np.array_equal(old, sig):
+                return
+            for band in self._band_keys(old):
+                self.buckets[band].discard(key)
+        self.signatures[key] = sig
+        for band in self._band_keys(sig):
+            self.buckets[band].add(key)
+
+    def query(self, text):
+        candidates = set()
+        for band in self._band_keys(signature(text)):
+            candidates |= self.buckets.get(band, set())
+        return candidates
+
+    def to_dict(self):
+        return {k: [int(x) for x in sig] for k, sig in self.signatures.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        for key, sig in data.items():
+            index.set_signature(key, sig)
+        return index
@@ -1,49 +1,257 @@
-import random
+import os
+import time
+import shutil
+import numpy as np
+import pandas as pd
 from faker import Faker
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from generation_plan import GenerationPlan
+from unique_generators import make_unique_generator
+from counter_rng import key64, uniforms, random_bits
+from sampling import alias_sample
+from date_stats import format_dates
+from templates import TemplateFiller
 
 faker = Faker()
 
 class MockDataGenerator:
-    def __init__(self, kb, records=500):
+    def __init__(self, kb, records=500, seed=None, plan_cache="plan_cache", salt=None, unique_ints=None,
+                 random_access=False):
         self.kb = kb
         self.records = records
-        self.generated_uniques = defaultdict(set)
-
-    def generate_value(self, col, i):
-        patterns = self.kb.patterns.get(col, [])
-        stats = self.kb.stats.get(col, {})
-        common_vals = [v for v, _ in self.kb.value_sets[col].most_common(10)]
-
-        if col in self.kb.uniques:
-            if "int" in patterns:
-                val = int(stats.get("min", 1000)) + len(self.generated_uniques[col])
-                self.generated_uniques[col].add(val)
-                return val
-            if "text" in patterns:
-                while True:
-                    val = faker.uuid4()
-                    if val not in self.generated_uniques[col]:
-                        self.generated_uniques[col].add(val)
-                        return val
-
-        if "int" in patterns:
-            return faker.random_int(min=int(stats.get("min", 1000)), max=int(stats.get("max", 9999)))
-        if "float" in patterns:
-            mu = stats.get("mean", 100.0)
-            sigma = stats.get("std", 10.0)
-            return round(random.uniform(mu - sigma, mu + sigma), 2)
-        if "date" in patterns:
-            return faker.date()
-        if "boolean" in patterns:
-            return faker.random_element(["Yes", "No"])
-        if common_vals:
-            return faker.random_element(common_vals)
-        return faker.word()
+        self.plan_cache = plan_cache
+        self.plans = {}
+        self.unique_ints = unique_ints
+        self.unique_generators = {}
+        self.choice_tables = {}
+        self.quantile_tables = {}
+        self.template_fillers = {}
+        # random_access makes every cell a pure function of (salt, column, row index)
+        self.random_access = random_access
+        self.rng = np.random.default_rng(seed)
+        # Run-wide salt for derived values; every shard of one job shares it
+        self.salt = salt if salt is not None else int(np.random.SeedSequence(seed).generate_state(1, np.uint64)[0])
+
+    @classmethod
+    def from_plan(cls, plan, records=500, seed=None, salt=None, unique_ints=None, random_access=False):
+        gen = cls(None, records, seed, plan_cache=None, salt=salt, unique_ints=unique_ints,
+                  random_access=random_access)
+        gen.plans[tuple(plan.columns)] = plan
+        return gen
+
+    # ------------ Column Engine ------------
+    def plan_for(self, columns):
+        key = tuple(dict.fromkeys(columns))
+        if key not in self.plans:
+            self.plans[key] = GenerationPlan.for_columns(self.kb, key, self.plan_cache, self.records)
+        return self.plans[key]
+
+    def generate_column(self, col, n, start=0, spec=None):
+        """Generate `n` values of `col` as one array, `start` being the global row index of the first."""
+        spec = spec or self.plan_for([col])[col]
+        kind = spec["kind"]
+
+        if kind == "unique":
+            return self._unique_generator(col, spec).take(start, n)
+        u = self._uniforms(col, n, start)
+        if kind == "int":
+            return spec["low"] + self._indices(u, spec["high"] - spec["low"] + 1)
+        if kind == "float":
+            mu, sigma = spec["mu"], spec["sigma"]
+            return np.round(mu - sigma + u * (2 * sigma), 2)
+        if kind == "quantile":
+            lo, width, starts, cdf = self._quantile_table(col, spec)
+            rank = u * cdf[-1]
+            idx = np.minimum(np.searchsorted(cdf, rank, side="right"), len(cdf) - 1)
+            frac = (rank - starts[idx]) / (cdf[idx] - starts[idx])
+            values = np.clip(lo[idx] + frac * width[idx], spec["low"], spec["high"])
+            if spec["decimals"] == 0:
+                return np.round(values).astype(np.int64)
+            return np.round(values, spec["decimals"])
+        if kind == "date":
+            unit = spec.get("unit", "D")
+            low, high = np.datetime64(spec["low"], unit), np.datetime64(spec["high"], unit)
+            steps = self._indices(u, (high - low).astype(np.int64) + 1)
+            return format_dates(low + steps, spec.get("format", "%Y-%m-%d"))
+        if kind == "template":
+            fillers, prob, alias = self._template_table(col, spec)
+            which = alias_sample(u, prob, alias)
+            noise = self._random_bytes(col, n, start, max(f.length for f in fillers))
+            out = np.empty(n, dtype=object)
+            for i, filler in enumerate(fillers):
+                rows = np.flatnonzero(which == i)
+                if len(rows):
+                    out[rows] = filler.fill(noise[rows])
+            return out
+        if kind == "choice":
+            values, prob, alias = self._choice_table(col, spec)
+            if prob is None:
+                return values[self._indices(u, len(values))]
+            return values[alias_sample(u, prob, alias)]
+        words = np.array(faker.get_words_list(), dtype=object)
+        return words[self._indices(u, len(words))]
+
+    def _uniforms(self, col, n, start):
+        if self.random_access:
+            return uniforms(key64(self.salt, col), start, n)
+        return self.rng.random(n)
+
+    def _random_bytes(self, col, n, start, width):
+        """(n, width) random bytes, one independent stream of 8 bytes per row and word."""
+        if not self.random_access:
+            return np.frombuffer(self.rng.bytes(n * width), dtype=np.uint8).reshape(n, width)
+        words = [random_bits(key64(self.salt, col, "bytes", w), start, n) for w in range(-(-width // 8))]
+        return np.stack(words, axis=1).view(np.uint8)[:, :width]
+
+    @staticmethod
+    def _indices(u, size):
+        return np.minimum((u * size).astype(np.int64), size - 1)
+
+    def _choice_table(self, col, spec):
+        if col not in self.choice_tables:
+            values = np.array(spec["values"], dtype=object)
+            if "prob" in spec:
+                self.choice_tables[col] = (values, np.array(spec["prob"]), np.array(spec["alias"], dtype=np.int64))
+            else:
+                self.choice_tables[col] = (values, None, None)
+        return self.choice_tables[col]
+
+    def _template_table(self, col, spec):
+        if col not in self.template_fillers:
+            self.template_fillers[col] = ([TemplateFiller(t) for t in spec["templates"]], np.array(spec["prob"]),
+                                          np.array(spec["alias"], dtype=np.int64))
+        return self.template_fillers[col]
+
+    def _quantile_table(self, col, spec):
+        if col not in self.quantile_tables:
+            lo, hi = np.array(spec["lo"]), np.array(spec["hi"])
+            cdf = np.array(spec["cdf"], dtype=float)
+            self.quantile_tables[col] = (lo, hi - lo, np.concatenate(([0.0], cdf[:-1])), cdf)
+        return self.quantile_tables[col]
+
+    def _unique_generator(self, col, spec):
+        if col not in self.unique_generators:
+            strategy = self.unique_ints if spec["strategy"] in ("counter", "permutation") else None
+            self.unique_generators[col] = make_unique_generator(spec, self.salt, col, strategy)
+        return self.unique_generators[col]
+
+    def generate_columns(self, columns, n=None, start=0):
+        n = self.records if n is None else n
+        plan = self.plan_for(columns)
+        return {col: self.generate_column(col, n, start, plan[col]) for col in plan.columns}
+
+    # ------------ Row Assembly ------------
+    def generate_frame(self, columns, n=None, start=0):
+        return pd.DataFrame(self.generate_columns(columns, n, start))[list(columns)]
 
     def generate(self, columns):
-        data = []
-        for i in range(self.records):
-            row = {col: self.generate_value(col, i) for col in columns}
-            data.append(row)
-        return data
+        return self.generate_frame(columns).to_dict("records")
+
+    def generate_range(self, columns, start, stop):
+        """Rows [start, stop) of the dataset; only reproducible on their own with random_access."""
+        frame = self.generate_frame(columns, max(stop - start, 0), start)
+        frame.index = range(start, start + len(frame))
+        return frame
+
+    # ------------ Streaming Output ------------
+    def iter_batches(self, columns, batch_size=100_000, n=None, start=0):
+        n = self.records if n is None else n
+        for offset in range(0, n, batch_size):
+            yield self.generate_frame(columns, min(batch_size, n - offset), start + offset)
+
+    def write_csv(self, columns, output_file, batch_size=100_000, n=None, start=0, header=True, resume=False):
+        """Append fixed-size batches to `output_file` so memory stays bounded by `batch_size`.
+
+        With resume=True (random_access only) rows already in `output_file` are kept and
+        generation picks up at the next row index.
+        """
+        n = self.records if n is None else n
+        done, mode, need_header = 0, "w", header
+        if resume and os.path.exists(output_file):
+            if not self.random_access:
+                raise ValueError("resume requires random_access generation")
+            lines = _complete_lines(output_file)
+            done = max(lines - (1 if header else 0), 0)
+            need_header = header and lines == 0
+            mode = "a"
+        written, began = done, time.perf_counter()
+        with open(output_file, mode, newline="") as f:
+            for frame in self.iter_batches(columns, batch_size, n - done, start + done):
+                frame.to_csv(f, index=False, header=need_header and written == done)
+                written += len(frame)
+                rate = (written - done) / max(time.perf_counter() - began, 1e-9)
+                print(f"📝 {written:,} rows written ({rate:,.0f} rows/sec)")
+            if written == 0 and need_header:
+                pd.DataFrame(columns=list(columns)).to_csv(f, index=False)
+        return written
+
+    def write_fixed_width(self, columns, output_file, layout, batch_size=100_000, n=None, start=0):
+        """Like write_csv, but each row padded into the spans of a FixedWidthLayout, without a header."""
+        n = self.records if n is None else n
+        written, began = 0, time.perf_counter()
+        with open(output_file, "w", newline="") as f:
+            for frame in self.iter_batches(columns, batch_size, n, start):
+                f.write(layout.format([frame[col] for col in frame.columns]))
+                written += len(frame)
+                rate = written / max(time.perf_counter() - began, 1e-9)
+                print(f"📝 {written:,} rows written ({rate:,.0f} rows/sec)")
+        return written
+
+def _complete_lines(path):
+    """Count finished lines in `path`, truncating any partially written last line."""
+    lines, last_newline, offset = 0, -1, 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            pos = block.rfind(b"\n")
+            if pos >= 0:
+                last_newline = offset + pos
+            offset += len(block)
+    if last_newline + 1 != offset:
+        with open(path, "r+b") as f:
+            f.truncate(last_newline + 1)
+    return lines
+
+# ------------ Sharded Output ------------
+def _write_shard(plan_data, columns, part_file, start, count, seed, salt, batch_size, header, unique_ints,
+                 random_access):
+    gen = MockDataGenerator.from_plan(GenerationPlan.from_dict(plan_data), count, seed, salt, unique_ints,
+                                      random_access)
+    return gen.write_csv(columns, part_file, batch_size, count, start, header)
+
+def write_csv_sharded(kb, columns, output_file, records, shards=4, seed=None, workers=None,
+                      batch_size=100_000, merge=True, plan_cache="plan_cache", unique_ints=None,
+                      random_access=False):
+    """Generate `records` rows as `shards` contiguous row ranges on a process pool.
+
+    Each shard draws from a child seed spawned from `seed`, so a fixed (seed, shards) pair
+    always yields the same bytes; with random_access the output no longer depends on the
+    shard count at all. With merge=False the ordered part files are kept instead.
+    """
+    plan = GenerationPlan.for_columns(kb, columns, plan_cache, records)
+    root = np.random.SeedSequence(seed)
+    salt = int(root.generate_state(1, np.uint64)[0])
+    child_seeds = root.spawn(shards)
+
+    bounds, start = [], 0
+    for i in range(shards):
+        count = records // shards + (1 if i < records % shards else 0)
+        bounds.append((start, count))
+        start += count
+
+    parts = [f"{output_file}.part-{i:05d}" for i in range(shards)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_write_shard, plan.to_dict(), list(columns), parts[i], s, c,
+                        child_seeds[i], salt, batch_size, i == 0 or not merge, unique_ints, random_access)
+            for i, (s, c) in enumerate(bounds)
+        ]
+        written = sum(f.result() for f in futures)
+
+    if merge:
+        with open(output_file, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+    return written
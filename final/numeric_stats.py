@@ -0,0 +1,161 @@
+import math
+import numpy as np
+
+# Magnitudes below this land in the sketch's zero bucket
+MIN_VALUE = 1e-9
+
+# ------------ Quantile Sketch ------------
+class QuantileSketch:
+    """DDSketch-style log-bucketed histogram: every quantile is within `alpha` relative error.
+
+    Bucket k holds values in (gamma^(k-1), gamma^k] with gamma = (1 + alpha) / (1 - alpha),
+    so merging two sketches is adding bucket counts. Past `max_bins` buckets per sign the
+    smallest-magnitude ones are folded together, which only blurs the low tail.
+    """
+
+    def __init__(self, alpha=0.01, max_bins=2048):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.zero = 0
+        self.pos = {}
+        self.neg = {}
+
+    @property
+    def count(self):
+        return self.zero + sum(self.pos.values()) + sum(self.neg.values())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        self.zero += int((np.abs(values) < MIN_VALUE).sum())
+        for store, part in ((self.pos, values[values >= MIN_VALUE]), (self.neg, -values[values <= -MIN_VALUE])):
+            if len(part):
+                keys, counts = np.unique(np.ceil(np.log(part) / self.log_gamma).astype(np.int64), return_counts=True)
+                for k, c in zip(keys.tolist(), counts.tolist()):
+                    store[k] = store.get(k, 0) + c
+        self._collapse()
+        return self
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError(f"Cannot merge sketches with alpha {self.alpha} and {other.alpha}")
+        self.zero += other.zero
+        for store, theirs in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, c in theirs.items():
+                store[k] = store.get(k, 0) + c
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        for store in (self.pos, self.neg):
+            if len(store) > self.max_bins:
+                keys = sorted(store)
+                cut = keys[len(keys) - self.max_bins]
+                store[cut] += sum(store.pop(k) for k in keys[:len(keys) - self.max_bins])
+
+    def buckets(self):
+        """(lower edges, upper edges, counts) in ascending value order."""
+        neg = sorted(self.neg, reverse=True)
+        pos = sorted(self.pos)
+        lo = [-self.gamma ** k for k in neg] + [0.0] * bool(self.zero) + [self.gamma ** (k - 1) for k in pos]
+        hi = [-self.gamma ** (k - 1) for k in neg] + [0.0] * bool(self.zero) + [self.gamma ** k for k in pos]
+        counts = [self.neg[k] for k in neg] + [self.zero] * bool(self.zero) + [self.pos[k] for k in pos]
+        return np.array(lo), np.array(hi), np.array(counts, dtype=np.int64)
+
+    def quantiles(self, qs):
+        lo, hi, counts = self.buckets()
+        if not len(counts):
+            return np.full(np.shape(qs), np.nan)
+        cdf = np.cumsum(counts)
+        idx = np.minimum(np.searchsorted(cdf, np.asarray(qs) * (cdf[-1] - 1), side="right"), len(cdf) - 1)
+        # Bucket midpoint in log space is the alpha-accurate estimate
+        return np.where(lo[idx] == hi[idx], lo[idx], 2 * lo[idx] * hi[idx] / (lo[idx] + hi[idx]))
+
+    def to_dict(self):
+        return {
+            "alpha": self.alpha,
+            "zero": self.zero,
+            "pos": {str(k): c for k, c in sorted(self.pos.items())},
+            "neg": {str(k): c for k, c in sorted(self.neg.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get("alpha", 0.01))
+        sketch.zero = data.get("zero", 0)
+        sketch.pos = {int(k): c for k, c in data.get("pos", {}).items()}
+        sketch.neg = {int(k): c for k, c in data.get("neg", {}).items()}
+        return sketch
+
+# ------------ Online Moments ------------
+class NumericStats:
+    """count/mean/M2 accumulator plus min/max and a quantile sketch, mergeable across chunks and runs.
+
+    to_dict keeps the KB's min/max/mean/std/max_length keys alongside count, m2 and sketch.
+    Stats saved before these were tracked load with count 0: their min/max still widen the
+    range, but the moments come from whatever is merged in next.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return self
+        other = NumericStats()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        other.sketch.update(values)
+        return self.merge(other)
+
+    def merge(self, other):
+        # Chan et al. parallel variance merge
+        total = self.count + other.count
+        if total:
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0
+
+    def to_dict(self):
+        return {
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "std": self.std,
+            "max_length": len(str(int(self.max))),
+            "count": self.count,
+            "m2": self.m2,
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        if "min" in data:
+            stats.min, stats.max = float(data["min"]), float(data["max"])
+        if data.get("count"):
+            stats.count = data["count"]
+            stats.mean = data["mean"]
+            stats.m2 = data["m2"]
+            stats.sketch = QuantileSketch.from_dict(data["sketch"])
+        return stats
@@ -0,0 +1,69 @@
+import re
+from itertools import islice
+
+# ------------ Pattern Detection ------------
+TYPE_PATTERNS = {
+    "int": r"\d+",
+    "float": r"\d+\.\d{2}",
+    "date": r"\d{4}[-/]\d{2}[-/]\d{2}",
+    "boolean": r"(?i:yes|no|true|false|y|n)",
+}
+# Whole-column checks run over the values joined by newlines, so each type test is a
+# single C-level regex scan that stops at the first value that does not match.
+COLUMN_MATCH = {t: re.compile(rf"(?:{p}\n)*{p}") for t, p in TYPE_PATTERNS.items()}
+VALUE_MATCH = {t: re.compile(rf"^{p}$", re.M) for t, p in TYPE_PATTERNS.items()}
+CATEGORICAL_LIMIT = 20
+
+class PatternEngine:
+    """Type shares of a column's values; classify is the one entry point, used by ColumnProfile."""
+
+    @staticmethod
+    def _prepare(values):
+        values = [v for v in values if v]
+        text = "\n".join(values)
+        if text.count("\n") != max(len(values) - 1, 0):
+            # Embedded newlines would split values; fall back to matching one by one
+            return values, None
+        return values, text
+
+    @staticmethod
+    def _few_distinct(values):
+        if len(set(islice(values, 10_000))) >= CATEGORICAL_LIMIT:
+            return False
+        return len(set(values)) < CATEGORICAL_LIMIT
+
+    @staticmethod
+    def _share(t, values, text, min_ratio):
+        """Share of `values` matching type `t`, or 0.0 once it can no longer reach `min_ratio`."""
+        total = len(values)
+        if text is not None and min_ratio >= 1.0:
+            return 1.0 if COLUMN_MATCH[t].fullmatch(text) else 0.0
+        if text is not None:
+            share = len(VALUE_MATCH[t].findall(text)) / total
+            return share if share >= min_ratio else 0.0
+        allowed = total * (1 - min_ratio)
+        misses = 0
+        for v in values:
+            if not VALUE_MATCH[t].fullmatch(v):
+                misses += 1
+                if misses > allowed:
+                    return 0.0
+        return (total - misses) / total
+
+    @staticmethod
+    def classify(values, min_ratio=0.0):
+        """Share of non-empty values matching each type, plus whether the column looks categorical.
+
+        A type is ruled out, and reported as 0.0, as soon as its share cannot reach `min_ratio`;
+        at 1.0 each test stops at the first value that does not match. No value fits two
+        types, so the types after one every value matches are not tested at all.
+        """
+        values, text = PatternEngine._prepare(values)
+        ratios = dict.fromkeys(TYPE_PATTERNS, 0.0)
+        if values:
+            for t in TYPE_PATTERNS:
+                ratios[t] = PatternEngine._share(t, values, text, min_ratio)
+                if ratios[t] == 1.0:
+                    break
+        return {"ratios": ratios, "total": len(values),
+                "categorical": bool(values) and PatternEngine._few_distinct(values)}
@@ -0,0 +1,55 @@
+import json
+import hashlib
+from sqlite_cache import SQLiteCache
+from profiler import ColumnProfile
+from fixed_width import FixedWidthLayout
+
+# Part of the cache key: bump whenever profiling or the cached layout changes
+PROFILE_FORMAT = 4
+
+def file_fingerprint(filepath, block_size=1 << 20):
+    """sha256 of the file's bytes, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ProfileCache:
+    """Learned results per input content: header names, KB columns, column profiles and any
+    fixed-width layout.
+
+    Keyed by the file's content hash plus the settings that shape the result (including
+    which KB learned it), so a repeat run can skip parsing, GenAI and KB merging.
+    """
+
+    def __init__(self, path="profile_cache.db", max_entries=1_000, ttl=None):
+        self.path = path
+        self.store = SQLiteCache(path, max_entries, ttl)
+
+    @staticmethod
+    def key(filepath, **settings):
+        blob = json.dumps([PROFILE_FORMAT, file_fingerprint(filepath), settings], sort_keys=True).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def get(self, key):
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        entry["profiles"] = [ColumnProfile.from_dict(p) for p in entry["profiles"]]
+        entry["layout"] = FixedWidthLayout.from_dict(entry["layout"]) if entry["layout"] else None
+        return entry
+
+    def set(self, key, headers, columns, profiles, layout=None):
+        self.store.set(key, {
+            "headers": headers,
+            "columns": columns,
+            "profiles": [p.to_dict() for p in profiles],
+            "layout": layout.to_dict() if layout else None,
+        })
+
+    def flush(self):
+        self.store.flush()
+
+    def stats(self):
+        return self.store.stats()
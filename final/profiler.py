@@ -0,0 +1,217 @@
+import re
+from itertools import zip_longest
+from pattern_engine import PatternEngine, TYPE_PATTERNS
+from numeric_stats import NumericStats
+from date_stats import DateStats
+from cardinality import HyperLogLog, looks_unique, cardinality_class
+from heavy_hitters import SpaceSaving, DEFAULT_BUDGET
+from templates import TEMPLATE_BUDGET, template_of
+from fixed_width import FixedWidthLayout
+from delimited import split_records, iter_delimited_columns
+from sampling import Reservoir, StratifiedReservoir, subsample
+
+NUMERIC = re.compile(r"\d+(\.\d+)?")
+
+# ------------ Delimiter + Header Detection ------------
+def split_line(line, delim):
+    if isinstance(delim, FixedWidthLayout):
+        return delim.split(line)
+    return line.split(delim) if delim else re.split(r"\s{2,}", line)
+
+def detect_layout(lines):
+    """(delimiter, has_header, parsed rows) for non-empty `lines`.
+
+    The delimiter is a FixedWidthLayout when no separator character works, inferred from
+    the unstripped lines, or None when not even that finds two columns.
+    """
+    if not lines:
+        return None, False, []
+    raw, lines = lines, [line.strip() for line in lines]
+
+    for delim in [",", "|", "\t"]:
+        if len(lines[0].split(delim)) > 1:
+            parsed = split_records(lines, delim)
+            row1, row2 = parsed[0], parsed[1] if len(parsed) > 1 else []
+            is_text = lambda x: bool(re.fullmatch(r"[A-Za-z_][\w\s]*", x))
+            is_num = lambda x: bool(re.fullmatch(r"\d+(\.\d+)?", x))
+            header = (
+                len(row2) > 0 and
+                sum(is_text(c.strip()) for c in row1) / len(row1) > 0.5 and
+                sum(is_num(c.strip()) for c in row2) / len(row2) > 0.3
+            )
+            return delim, header, parsed
+
+    # Fallback: fixed-width columns (only if no other delimiter works)
+    layout = FixedWidthLayout.infer(raw)
+    if layout:
+        return layout, False, [layout.split(line) for line in raw]
+
+    return None, False, []
+
+def read_prefix_lines(filepath, prefix_bytes=1 << 16, strip=True):
+    """Non-empty lines from the first `prefix_bytes` of the file, minus any cut-off last line.
+
+    strip=False keeps leading/trailing spaces, which fixed-width layouts need.
+    """
+    with open(filepath, "r") as f:
+        prefix = f.read(prefix_bytes)
+        complete = not f.read(1)
+    lines = prefix.splitlines()
+    if not complete and len(lines) > 1:
+        lines = lines[:-1]
+    return [line.strip() if strip else line for line in lines if line.strip()]
+
+def sniff(filepath, prefix_bytes=1 << 16):
+    """detect_layout over a bounded prefix of the file instead of the whole file."""
+    return detect_layout(read_prefix_lines(filepath, prefix_bytes, strip=False))
+
+def iter_row_chunks(filepath, delim, chunk_rows=50_000, skip_header=False):
+    fixed = isinstance(delim, FixedWidthLayout)
+    chunk = []
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.rstrip("\r\n") if fixed else line.strip()
+            if not line.strip():
+                continue
+            if skip_header:
+                skip_header = False
+                continue
+            chunk.append(split_line(line, delim))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+# ------------ Column Profiles ------------
+class ColumnProfile:
+    """Incremental per-column evidence built chunk by chunk and mergeable across chunks.
+
+    Memory per column is fixed: the most frequent values are kept in a Space-Saving summary
+    of `value_budget` entries, and uniqueness and the categorical/text class come from the
+    HyperLogLog distinct estimate. Type patterns are classified on a reservoir sample of
+    `sample_budget` values (stratified by character-class template if asked) and scaled up
+    to the full count.
+    """
+
+    def __init__(self, value_budget=DEFAULT_BUDGET, sample_budget=10_000, stratify=False):
+        self.count = 0
+        # Type matches carried over from serialized profiles, which keep no sample
+        self.base_matched = dict.fromkeys(TYPE_PATTERNS, 0)
+        self.sample = StratifiedReservoir(sample_budget, template_of) if stratify else Reservoir(sample_budget)
+        self.values = SpaceSaving(value_budget)
+        self.numeric = NumericStats()
+        self.dates = DateStats()
+        self.templates = SpaceSaving(TEMPLATE_BUDGET)
+        self.distinct = HyperLogLog()
+
+    def update(self, values):
+        values = [v for v in values if v]
+        if not values:
+            return
+        self.count += len(values)
+        self.sample.update(values)
+        self.values.update(values)
+        self.distinct.update(values)
+        self.numeric.update([float(v) for v in values if NUMERIC.fullmatch(v)])
+        self.dates.update(values)
+        self.templates.update(map(template_of, values))
+
+    @property
+    def matched(self):
+        matched = dict(self.base_matched)
+        for sample, seen in self.sample.strata():
+            if sample:
+                # Only types every value matches can decide the column, so the rest exit early
+                for t, share in PatternEngine.classify(sample, min_ratio=1.0)["ratios"].items():
+                    matched[t] += round(share * seen)
+        return matched
+
+    def merge(self, other):
+        self.count += other.count
+        for t in self.base_matched:
+            self.base_matched[t] += other.base_matched[t]
+        self.sample.merge(other.sample)
+        self.values.update(other.values.counts)
+        self.numeric.merge(other.numeric)
+        self.dates.merge(other.dates)
+        self.templates.update(other.templates.counts)
+        self.distinct.merge(other.distinct)
+        return self
+
+    def patterns(self):
+        if not self.count:
+            return ["text"]
+        matched = self.matched
+        for t in TYPE_PATTERNS:
+            if matched[t] == self.count:
+                return [t]
+        if self.dates.count == self.count:
+            # Timestamps and day-first dates the date regex does not cover
+            return ["date"]
+        return [cardinality_class(self.distinct)]
+
+    def is_unique(self):
+        return looks_unique(self.distinct)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "matched": self.matched,
+            "value_budget": self.values.capacity,
+            "values": dict(self.values.items()),
+            "value_errors": self.values.errors,
+            "numeric": self.numeric.to_dict() if self.numeric.count else None,
+            "dates": self.dates.to_dict() if self.dates.count else None,
+            "templates": self.templates.counts,
+            "distinct": self.distinct.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls(data.get("value_budget", DEFAULT_BUDGET))
+        profile.count = data["count"]
+        profile.base_matched.update(data["matched"])
+        profile.values.update(data["values"])
+        profile.values.errors.update({v: e for v, e in data.get("value_errors", {}).items() if v in profile.values})
+        if data["numeric"]:
+            profile.numeric = NumericStats.from_dict(data["numeric"])
+        profile.dates = DateStats.from_dict(data.get("dates"))
+        profile.templates.update(data.get("templates", {}))
+        profile.distinct = HyperLogLog.from_dict(data["distinct"])
+        return profile
+
+def iter_column_chunks(filepath, delim, chunk_rows=50_000, skip_header=False):
+    """Per chunk of rows, one list of values per column position."""
+    if isinstance(delim, FixedWidthLayout):
+        yield from delim.iter_columns(filepath, chunk_rows, skip_header)
+        return
+    if delim:
+        yield from iter_delimited_columns(filepath, delim, chunk_rows, skip_header)
+        return
+    for chunk in iter_row_chunks(filepath, delim, chunk_rows, skip_header):
+        width = max(len(r) for r in chunk)
+        yield [[r[i] for r in chunk if i < len(r)] for i in range(width)]
+
+def read_rows(filepath, delim, skip_header=False):
+    """Every row of `filepath`, parsed the same way profile_file reads it."""
+    rows = []
+    for columns in iter_column_chunks(filepath, delim, skip_header=skip_header):
+        rows.extend(list(row) for row in zip(*columns))
+    return rows
+
+def profile_file(filepath, delim, has_header, chunk_rows=50_000, value_budget=DEFAULT_BUDGET, sample_budget=10_000,
+                 stratify=False):
+    """Stream `filepath` in chunks of rows into one ColumnProfile per column position."""
+    profiles = []
+    for columns in iter_column_chunks(filepath, delim, chunk_rows, skip_header=has_header):
+        while len(profiles) < len(columns):
+            profiles.append(ColumnProfile(value_budget, sample_budget, stratify))
+        for profile, values in zip(profiles, columns):
+            profile.update(values)
+    return profiles
+
+def sample_rows(profiles, n, seed=0):
+    """`n` rows assembled from each column's sample, for prompts that expect whole rows."""
+    columns = [subsample(p.sample.values, n, seed) for p in profiles]
+    return [list(row) for row in zip_longest(*columns, fillvalue="")]
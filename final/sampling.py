@@ -0,0 +1,134 @@
+import numpy as np
+
+# ------------ Alias Tables ------------
+def build_alias_table(weights):
+    """Vose's alias method: O(K) build, then O(1) per draw from a single uniform."""
+    weights = np.asarray(weights, dtype=np.float64)
+    k = len(weights)
+    scaled = weights * (k / weights.sum())
+    prob = np.ones(k)
+    alias = np.arange(k)
+    small = [i for i in range(k) if scaled[i] < 1.0]
+    large = [i for i in range(k) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+def alias_sample(u, prob, alias):
+    """Map uniforms in [0, 1) to table indices; the fractional part acts as the coin flip."""
+    k = len(prob)
+    scaled = u * k
+    idx = np.minimum(scaled.astype(np.int64), k - 1)
+    return np.where(scaled - idx < prob[idx], idx, alias[idx])
+
+# ------------ Reservoir Sampling ------------
+class Reservoir:
+    """Uniform sample of at most `budget` values from a stream of any length (Algorithm R).
+
+    Replacement draws are vectorized per chunk and every reservoir with the same seed makes
+    the same draws, so reservoirs fed equal-length column chunks keep the same row positions.
+    """
+
+    def __init__(self, budget=10_000, seed=0):
+        self.budget = budget
+        self.seen = 0
+        self.values = []
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = list(values)
+        fill = min(len(values), self.budget - len(self.values))
+        self.values.extend(values[:fill])
+        if fill < len(values):
+            # Value i of the chunk is the t-th of the stream and replaces a random slot with probability budget/t
+            t = np.arange(self.seen + fill + 1, self.seen + len(values) + 1)
+            slots = (self.rng.random(len(t)) * t).astype(np.int64)
+            for i in np.flatnonzero(slots < self.budget):
+                self.values[slots[i]] = values[fill + i]
+        self.seen += len(values)
+        return self
+
+    def shrink(self, budget):
+        """Cut to a uniform subsample of `budget` values, keeping their order."""
+        self.budget = budget
+        if len(self.values) > budget:
+            keep = np.sort(self.rng.choice(len(self.values), budget, replace=False))
+            self.values = [self.values[i] for i in keep]
+        return self
+
+    def merge(self, other):
+        """Uniform sample of the union: each side contributes in proportion to what it has seen."""
+        if not other.seen:
+            return self
+        total = min(self.budget, len(self.values) + len(other.values))
+        if self.seen and other.seen:
+            mine = int(self.rng.hypergeometric(self.seen, other.seen, total))
+            mine = min(max(mine, total - len(other.values)), len(self.values))
+        else:
+            mine = len(self.values)
+        theirs = total - mine
+        picked = [self.values[i] for i in np.sort(self.rng.choice(len(self.values), mine, replace=False))]
+        picked += [other.values[i] for i in np.sort(self.rng.choice(len(other.values), theirs, replace=False))]
+        self.values = picked
+        self.seen += other.seen
+        return self
+
+    def strata(self):
+        """(sample, values seen) pairs; a plain reservoir is one stratum."""
+        return [(self.values, self.seen)]
+
+class StratifiedReservoir:
+    """One reservoir per `key(value)` stratum, the budget split evenly between strata, so rare
+    kinds of value are sampled as well as common ones. Strata past `max_strata` share one."""
+
+    def __init__(self, budget=10_000, key=len, max_strata=16, seed=0):
+        self.budget = budget
+        self.key = key
+        self.max_strata = max_strata
+        self.seed = seed
+        self.reservoirs = {}
+
+    @property
+    def seen(self):
+        return sum(r.seen for r in self.reservoirs.values())
+
+    @property
+    def values(self):
+        return [v for r in self.reservoirs.values() for v in r.values]
+
+    def _stratum(self, key):
+        if key not in self.reservoirs and len(self.reservoirs) >= self.max_strata:
+            key = None
+        if key not in self.reservoirs:
+            self.reservoirs[key] = Reservoir(self.budget, self.seed + len(self.reservoirs))
+            share = max(1, self.budget // len(self.reservoirs))
+            for reservoir in self.reservoirs.values():
+                reservoir.shrink(share)
+        return self.reservoirs[key]
+
+    def update(self, values):
+        groups = {}
+        for v in values:
+            groups.setdefault(self.key(v), []).append(v)
+        for key, group in groups.items():
+            self._stratum(key).update(group)
+        return self
+
+    def merge(self, other):
+        strata = other.reservoirs.items() if isinstance(other, StratifiedReservoir) else [(None, other)]
+        for key, reservoir in strata:
+            self._stratum(key).merge(reservoir)
+        return self
+
+    def strata(self):
+        return [(r.values, r.seen) for r in self.reservoirs.values()]
+
+def subsample(values, n, seed=0):
+    """`n` of `values` picked uniformly without replacement, in their original order."""
+    if len(values) <= n:
+        return list(values)
+    keep = np.sort(np.random.default_rng(seed).choice(len(values), n, replace=False))
+    return [values[i] for i in keep]
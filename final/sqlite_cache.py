@@ -0,0 +1,72 @@
+import json
+import time
+import sqlite3
+
+class SQLiteCache:
+    """Bounded key/value cache in SQLite with batched writes, LRU + TTL eviction and hit/miss counters.
+
+    `set` and LRU touches are buffered in memory until `flush`, so a run costs one
+    transaction instead of one file rewrite per insert.
+    """
+
+    def __init__(self, path, max_entries=10_000, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.pending = {}
+        self.touched = {}
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        if key in self.pending:
+            self.hits += 1
+            return self.pending[key][0]
+        row = self.conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touched[key] = now
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        self.pending[key] = (value, time.time())
+
+    def flush(self):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO entries (key, value, created, accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, created = excluded.created, "
+                "accessed = excluded.accessed",
+                [(k, json.dumps(v), t, t) for k, (v, t) in self.pending.items()],
+            )
+            self.conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?",
+                                  [(t, k) for k, t in self.touched.items()])
+            if self.ttl is not None:
+                self.conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+            if self.max_entries is not None:
+                self.conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        self.pending.clear()
+        self.touched.clear()
+
+    def stats(self):
+        size = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size, "pending": len(self.pending)}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
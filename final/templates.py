@@ -0,0 +1,76 @@
+import string
+import numpy as np
+
+# Templates kept per column; the rest are rare shapes that are dropped
+TEMPLATE_BUDGET = 64
+# A column is a structured code when this many shapes cover STRUCTURED_SHARE of its values
+STRUCTURED_TEMPLATES = 4
+STRUCTURED_SHARE = 0.9
+
+# Digits become 9, upper-case letters A and lower-case letters a; anything else is literal
+TEMPLATE = str.maketrans(string.digits + string.ascii_uppercase + string.ascii_lowercase,
+                         "9" * 10 + "A" * 26 + "a" * 26)
+ALPHABETS = {
+    ord("9"): string.digits.encode("ascii"),
+    ord("A"): string.ascii_uppercase.encode("ascii"),
+    ord("a"): string.ascii_lowercase.encode("ascii"),
+}
+
+# ------------ Template Learning ------------
+def template_of(value):
+    """Character-class template of a value: "1234QWE" -> "9999AAA", "24.000.0056" -> "99.999.9999"."""
+    return value.translate(TEMPLATE)
+
+def template_space(template):
+    """How many distinct values `template` can hold."""
+    space = 1
+    for b in template.encode("utf-8"):
+        space *= len(ALPHABETS.get(b, b"x"))
+    return space
+
+def looks_structured(templates):
+    """Whether a column's template counts describe codes (1234QWE, 24.000.0056, ABCD ST)
+    rather than free text: a few dominant shapes, carrying digits or punctuation or no
+    lower-case runs. Names and cities vary in length and are words, so they do not qualify."""
+    if not templates:
+        return False
+    ranked = sorted(templates.items(), key=lambda item: item[1], reverse=True)
+    dominant = ranked[:STRUCTURED_TEMPLATES]
+    if sum(n for _, n in dominant) < STRUCTURED_SHARE * sum(templates.values()):
+        return False
+    return all(any(c not in "Aa " for c in t) or "a" not in t for t, _ in dominant)
+
+# ------------ Template Filling ------------
+class TemplateFiller:
+    """Fills one template for many rows at once from random bytes.
+
+    Each byte of the template is a lookup table row: its class alphabet, or the literal
+    byte itself, so a (rows, length) byte matrix maps to output characters in one gather.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        code = template.encode("utf-8")
+        self.length = len(code)
+        self.sizes = np.array([len(ALPHABETS.get(b, b"x")) for b in code], dtype=np.uint16)
+        self.table = np.zeros((self.length, 26), dtype=np.uint8)
+        for i, b in enumerate(code):
+            alphabet = np.frombuffer(ALPHABETS.get(b, bytes([b])), dtype=np.uint8)
+            self.table[i, :len(alphabet)] = alphabet
+        self.ascii = template.isascii()
+
+    def fill(self, random_bytes):
+        """One value per row of a (rows, >= length) uint8 matrix of random bytes."""
+        picks = (random_bytes[:, :self.length].astype(np.uint16) * self.sizes) >> 8
+        out = self.table[np.arange(self.length), picks]
+        return self.decode(out)
+
+    def fill_digits(self, digits):
+        """One value per row of a (rows, length) matrix of per-position alphabet indices."""
+        return self.decode(self.table[np.arange(self.length), digits])
+
+    def decode(self, out):
+        raw = np.ascontiguousarray(out).view(f"S{max(self.length, 1)}").ravel()
+        if self.ascii:
+            return raw.astype(str).astype(object)
+        return np.array([v.decode("utf-8") for v in raw.tolist()], dtype=object)
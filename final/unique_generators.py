@@ -0,0 +1,118 @@
+import numpy as np
+from counter_rng import key64, mix64, random_bits
+from templates import TemplateFiller
+
+# Every generator maps a global row index to a value with O(1) state, so uniqueness
+# holds across batches and shards without remembering what was emitted.
+
+# ------------ Counter ------------
+class CounterUnique:
+    """start, start + 1, ... in row order."""
+
+    def __init__(self, start=1000, **_):
+        self.start = int(start)
+
+    def take(self, start, n):
+        return self.start + np.arange(start, start + n, dtype=np.int64)
+
+# ------------ Keyed Permutation ------------
+class PermutationUnique:
+    """Shuffled integers in [low, high]: a keyed Feistel permutation of the row index.
+
+    The domain is rounded up to an even number of bits and out-of-range outputs are
+    re-encrypted (cycle walking), so row i < high - low + 1 maps to a distinct value.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, low=0, high=9999, salt=0, col="", **_):
+        self.low = int(low)
+        self.size = int(high) - self.low + 1
+        half = max(1, ((self.size - 1).bit_length() + 1) // 2)
+        self.half_bits = np.uint64(half)
+        self.half_mask = np.uint64((1 << half) - 1)
+        self.keys = [np.uint64(key64(salt, col, r)) for r in range(self.ROUNDS)]
+
+    def _encrypt(self, x):
+        left, right = x >> self.half_bits, x & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ (mix64(right ^ key) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def take(self, start, n):
+        if start + n > self.size:
+            raise ValueError(f"Unique space of {self.size} values exhausted at row {start + n - 1}")
+        out = self._encrypt(np.arange(start, start + n, dtype=np.uint64))
+        walk = out >= np.uint64(self.size)
+        while walk.any():
+            out[walk] = self._encrypt(out[walk])
+            walk = out >= np.uint64(self.size)
+        return self.low + out.astype(np.int64)
+
+# ------------ Counter-derived UUID ------------
+class UuidUnique:
+    """Version-4 shaped UUIDs whose low 62 bits are the row index under a per-column prefix."""
+
+    HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+    SHIFTS = np.arange(60, -4, -4, dtype=np.uint64)
+
+    def __init__(self, salt=0, col="", **_):
+        high = (key64(salt, col) & ~(0xF << 12)) | (0x4 << 12)
+        self.prefix = f"{high >> 32:08x}-{(high >> 16) & 0xFFFF:04x}-{high & 0xFFFF:04x}-".encode("ascii")
+
+    def take(self, start, n):
+        low = (np.arange(start, start + n, dtype=np.uint64) & np.uint64(0x3FFFFFFFFFFFFFFF)) | np.uint64(0x2 << 62)
+        digits = self.HEX[((low[:, None] >> self.SHIFTS) & np.uint64(0xF)).astype(np.intp)]
+        out = np.empty((n, 36), dtype=np.uint8)
+        out[:, :19] = np.frombuffer(self.prefix, dtype=np.uint8)
+        out[:, 19:23] = digits[:, :4]
+        out[:, 23] = ord("-")
+        out[:, 24:] = digits[:, 4:]
+        return out.view("S36").ravel().astype(str).astype(object)
+
+# ------------ Template ------------
+class TemplateUnique:
+    """Distinct values of one character-class template: the keyed permutation of the row
+    index written in mixed radix over the template's class positions, right to left.
+
+    Positions beyond what the index needs (the permutation domain is capped at 2^62) are
+    filled from per-row hashes, which cannot make two rows equal.
+    """
+
+    def __init__(self, template="", salt=0, col="", **_):
+        self.filler = TemplateFiller(template)
+        self.salt, self.col = salt, col
+        sizes = self.filler.sizes.astype(object)
+        space = int(np.prod(sizes[sizes > 1])) if (sizes > 1).any() else 1
+        self.index = PermutationUnique(0, min(space, 1 << 62) - 1, salt, col)
+
+    def take(self, start, n):
+        x = self.index.take(start, n).astype(np.uint64)
+        digits = np.zeros((n, self.filler.length), dtype=np.intp)
+        covered = 1
+        for i in range(self.filler.length - 1, -1, -1):
+            size = int(self.filler.sizes[i])
+            if size == 1:
+                continue
+            if covered < self.index.size:
+                digits[:, i] = (x % np.uint64(size)).astype(np.intp)
+                x //= np.uint64(size)
+                covered *= size
+            else:
+                h = random_bits(key64(self.salt, self.col, "template", i), start, n)
+                digits[:, i] = (h % np.uint64(size)).astype(np.intp)
+        return self.filler.fill_digits(digits)
+
+UNIQUE_GENERATORS = {
+    "counter": CounterUnique,
+    "permutation": PermutationUnique,
+    "uuid": UuidUnique,
+    "template": TemplateUnique,
+}
+
+def make_unique_generator(spec, salt, col, strategy=None):
+    strategy = strategy or spec["strategy"]
+    if strategy not in UNIQUE_GENERATORS:
+        raise ValueError(f"Unknown unique strategy: {strategy}")
+    params = {k: v for k, v in spec.items() if k not in ("kind", "strategy")}
+    return UNIQUE_GENERATORS[strategy](salt=salt, col=col, **params)
@@ -1,65 +1,79 @@
 import os
+import sys
 import json
-import pandas as pd
 import re
+import hashlib
 import difflib
 import requests
-from faker import Faker
-from collections import defaultdict, Counter
-from statistics import mean, stdev
-
-faker = Faker()
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared generation engine lives alongside the final pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "final"))
+from mock_generator import MockDataGenerator, write_csv_sharded
+from sqlite_cache import SQLiteCache
+from profiler import ColumnProfile, read_prefix_lines, read_rows, profile_file, split_line
+from sampling import Reservoir, subsample
+from delimited import split_records
+from kb_store import KnowledgeStore
+from fixed_width import FixedWidthLayout
+from profile_cache import ProfileCache
 
 # ------------------ GenAI Cache ------------------ #
 
+# Part of the cache key: bump whenever the column-naming prompt changes
+PROMPT_VERSION = "column-name-v1"
+
 class GenAICache:
-    def __init__(self, path="genai_cache.json"):
+    def __init__(self, path="genai_cache.db", max_entries=10_000, ttl=None):
         self.path = path
-        self.cache = self.load()
+        self.store = SQLiteCache(path, max_entries, ttl)
 
-    def load(self):
-        return json.load(open(self.path)) if os.path.exists(self.path) else {}
-
-    def save(self):
-        with open(self.path, "w") as f:
-            json.dump(self.cache, f, indent=2)
+    @staticmethod
+    def key(values):
+        sample = [" ".join(str(v).split()) for v in values[:10]]
+        blob = json.dumps([PROMPT_VERSION, sample]).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
 
     def get(self, values):
-        key = "|".join(values[:5])
-        return self.cache.get(key)
+        return self.store.get(self.key(values))
 
     def set(self, values, column_name):
-        key = "|".join(values[:5])
-        self.cache[key] = column_name
-        self.save()
+        self.store.set(self.key(values), column_name)
+
+    def flush(self):
+        self.store.flush()
+
+    def stats(self):
+        return self.store.stats()
 
 # ------------------ GenAI Interface ------------------ #
 
 class GenAIColumnInferer:
-    def __init__(self, kb, genai_url, preset_id, cache_path="genai_cache.json"):
+    def __init__(self, kb, genai_url, preset_id, cache_path="genai_cache.db",
+                 max_workers=8, timeout=30, retries=3, backoff=0.5):
         self.kb = kb
         self.url = genai_url
         self.preset_id = preset_id
         self.cache = GenAICache(cache_path)
-
-    def infer_column_name(self, sample_values):
-        cached = self.cache.get(sample_values)
-        if cached:
-            return cached
-
-        prompt = (
-            "You are a data scientist helping label CSV data columns. "
-            "Based on the following sample values, suggest the most appropriate column name. "
-            "Return your answer as JSON in this format: {\"column_name\": \"...\"}. "
-            f"Values: {json.dumps(sample_values[:10])}"
-        )
-
-        payload = {
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # One pooled session: keep-alive connections shared by every worker thread
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"POST"}))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, prompt, max_tokens):
+        return {
             "fieldList": [],
             "folderIdList": [],
             "history": "",
             "modelId": "claude-3-7-sonnet@202",
-            "parameters": {"max_tokens": 5000},
+            "parameters": {"max_tokens": max_tokens},
             "top_p": 1.0,
             "temperature": 0.0,
             "presetId": self.preset_id,
@@ -69,27 +83,76 @@ class GenAIColumnInferer:
             "userId": ""
         }
 
+    def _ask(self, prompt, max_tokens=5000):
+        response = self.session.post(self.url, json=self._payload(prompt, max_tokens), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("output", "")
+
+    def _request_column_name(self, sample_values):
+        prompt = (
+            "You are a data scientist helping label CSV data columns. "
+            "Based on the following sample values, suggest the most appropriate column name. "
+            "Return your answer as JSON in this format: {\"column_name\": \"...\"}. "
+            f"Values: {json.dumps(sample_values[:10])}"
+        )
         try:
-            response = requests.post(self.url, json=payload)
-            result = response.json()
-            match = re.search(r'{\s*"column_name"\s*:\s*"([^"]+)"\s*}', result.get("output", ""))
+            match = re.search(r'{\s*"column_name"\s*:\s*"([^"]+)"\s*}', self._ask(prompt))
             if match:
-                col = match.group(1)
-                self.cache.set(sample_values, col)
-                return col
+                return match.group(1)
         except Exception as e:
             print(f"[❌] GenAI error: {e}")
         return None
 
+    def _request_column_names(self, samples):
+        prompt = (
+            "You are a data scientist helping label CSV data columns. "
+            "For each column below, suggest the most appropriate column name, in the same order. "
+            "Return your answer as JSON in this format: {\"columns\": [\"...\", \"...\"]}. "
+            f"Columns: {json.dumps([s[:10] for s in samples])}"
+        )
+        try:
+            match = re.search(r'{\s*"columns"\s*:\s*\[.*?\]\s*}', self._ask(prompt), re.S)
+            if match:
+                names = json.loads(match.group(0))["columns"]
+                if len(names) == len(samples):
+                    return names
+        except Exception as e:
+            print(f"[❌] GenAI error: {e}")
+        return [None] * len(samples)
+
+    def infer_column_name(self, sample_values):
+        return self.infer_column_names([sample_values])[0]
+
+    def infer_column_names(self, samples, batch=False):
+        """Names for many columns: cache first, then one batched prompt or concurrent per-column requests."""
+        names = [self.cache.get(s) for s in samples]
+        missing = [i for i, name in enumerate(names) if not name]
+        if not missing:
+            return names
+
+        if batch:
+            answers = self._request_column_names([samples[i] for i in missing])
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                answers = list(pool.map(self._request_column_name, [samples[i] for i in missing]))
+
+        # Cache writes stay on the calling thread; workers only do HTTP
+        for i, name in zip(missing, answers):
+            if name:
+                self.cache.set(samples[i], name)
+            names[i] = name
+        return names
+
     def match_against_kb(self, sample_values, genai_suggestion):
         if genai_suggestion in self.kb.columns:
             return genai_suggestion
 
-        candidates = list(self.kb.columns.keys())
         test_string = ' '.join(sample_values[:5])
         best_score, best_match = 0, None
 
-        for col in candidates:
+        # LSH narrows the KB to columns with similar value profiles before exact scoring
+        candidates = self.kb.value_index.query(test_string)
+        for col in sorted(candidates, key=lambda c: self.kb.alias_index.order.get(c, len(candidates))):
             known_vals = ' '.join(list(self.kb.value_sets[col].keys())[:10])
             score = difflib.SequenceMatcher(None, test_string, known_vals).ratio()
             if score > best_score:
@@ -99,139 +162,138 @@ class GenAIColumnInferer:
 
 # ------------------ Knowledge Base ------------------ #
 
-class KnowledgeBase:
-    def __init__(self, path="knowledge_base.json"):
-        self.path = path
-        self.columns = defaultdict(list)
-        self.patterns = defaultdict(list)
-        self.value_sets = defaultdict(Counter)
-        self.stats = defaultdict(dict)
-        self.uniques = set()
-        self.load()
-
-    def load(self):
-        if not os.path.exists(self.path): return
-        with open(self.path, "r") as f:
-            data = json.load(f)
-            self.columns = defaultdict(list, data.get("columns", {}))
-            self.patterns = defaultdict(list, data.get("patterns", {}))
-            self.value_sets = defaultdict(Counter, {k: Counter(v) for k, v in data.get("value_sets", {}).items()})
-            self.stats = defaultdict(dict, data.get("stats", {}))
-            self.uniques = set(data.get("uniques", []))
-
-    def save(self):
-        with open(self.path, "w") as f:
-            json.dump({
-                "columns": self.columns,
-                "patterns": self.patterns,
-                "value_sets": {k: dict(v) for k, v in self.value_sets.items()},
-                "stats": self.stats,
-                "uniques": list(self.uniques)
-            }, f, indent=2)
-
-    def add_column(self, name):
-        match = self._get_alias_match(name)
-        if match:
-            if name not in self.columns[match]:
-                self.columns[match].append(name)
-            return match
-        self.columns[name].append(name)
-        return name
+class KnowledgeBase(KnowledgeStore):
+    def match_column(self, name):
+        return self._get_alias_match(name)
 
     def _get_alias_match(self, name):
-        for canon, aliases in self.columns.items():
-            if difflib.get_close_matches(name.lower(), [canon.lower()] + [a.lower() for a in aliases], n=1, cutoff=0.85):
-                return canon
-        return None
-
-    def update_patterns(self, column, values):
-        detected = PatternEngine.infer_patterns(values)
-        self.patterns[column] = list(set(self.patterns[column] + detected))
-        self.value_sets[column].update(values)
-        if len(set(values)) == len(values):
-            self.uniques.add(column)
-        if any(p in detected for p in ("int", "float")):
-            self._update_numeric_stats(column, values)
-
-    def _update_numeric_stats(self, column, values):
-        numeric_vals = [float(v) for v in values if re.match(r"^\d+(\.\d+)?$", v)]
-        if numeric_vals:
-            self.stats[column] = {
-                "min": min(numeric_vals),
-                "max": max(numeric_vals),
-                "mean": mean(numeric_vals),
-                "std": stdev(numeric_vals) if len(numeric_vals) > 1 else 0,
-                "max_length": max(len(str(int(v))) for v in numeric_vals)
-            }
-
-# ------------------ Pattern Engine ------------------ #
-
-class PatternEngine:
-    @staticmethod
-    def infer_patterns(values):
-        values = [v for v in values if v]
-        if not values: return ["text"]
-        checks = {
-            "int": all(re.match(r"^\d+$", v) for v in values),
-            "float": all(re.match(r"^\d+\.\d{2}$", v) for v in values),
-            "date": all(re.match(r"^\d{4}[-/]\d{2}[-/]\d{2}$", v) for v in values),
-            "boolean": all(v.lower() in ["yes", "no", "true", "false", "y", "n"] for v in values)
-        }
-        for key, passed in checks.items():
-            if passed: return [key]
-        return ["categorical"] if len(set(values)) < 20 else ["text"]
+        return self.alias_index.fuzzy(name, cutoff=0.85)
 
 # ------------------ Generator ------------------ #
 
 class MockGenerator:
-    def __init__(self, kb, genai, records=500):
+    def __init__(self, kb, genai, records=500, seed=None, batch_prompt=False, profile_cache="profile_cache.db",
+                 sample_budget=10_000, stratify=False, prompt_values=20):
         self.kb = kb
         self.genai = genai
+        self.profile_cache = ProfileCache(profile_cache)
+        self.batch_prompt = batch_prompt
+        # Per-column reservoir budget for type inference, and how many of its values go into a GenAI prompt
+        self.sample_budget = sample_budget
+        self.stratify = stratify
+        self.prompt_values = prompt_values
         self.records = records
-        self.generated_uniques = defaultdict(set)
-
-    def parse_file(self, filepath):
-        with open(filepath, "r") as f:
-            lines = [line.strip() for line in f if line.strip()]
-
-        delim = "," if "," in lines[0] else "|" if "|" in lines[0] else None
-        if not delim:
-            # Attempt space-based fallback
-            lines = [re.split(r'\s{2,}', line) for line in lines]
-            delim = "SPACE"
-
-        if delim != "SPACE":
-            first = lines[0].split(delim)
-            second_row = lines[1].split(delim) if len(lines) > 1 else []
-            header_likely = all(re.match(r"[A-Za-z_]{2,}", cell) for cell in first)
-
-            if header_likely:
-                columns = first
-                data = [line.split(delim) for line in lines[1:]]
-                return columns, data
-            else:
-                data = [line.split(delim) for line in lines]
-                return [], data
-
-        # SPACE-delimited fallback
-        header_likely = all(re.match(r"[A-Za-z_]{2,}", val) for val in lines[0])
-        if header_likely:
-            return lines[0], lines[1:]
-        else:
-            return [], lines
+        self.seed = seed
+        self.engine = MockDataGenerator(kb, records, seed)
+        # Set by learn_file when the input is fixed-width
+        self.layout = None
+
+    @staticmethod
+    def _detect(lines):
+        """(delimiter, header_likely) for unstripped lines.
+
+        No separator means a fixed-width layout, or None (split on runs of spaces) when not
+        even that finds two columns.
+        """
+        first = lines[0].strip()
+        delim = next((d for d in (",", "|", "\t") if d in first), None) or FixedWidthLayout.infer(lines)
+        header_likely = all(re.match(r"[A-Za-z_]{2,}", cell) for cell in MockGenerator._split(lines[:1], delim)[0])
+        return delim, header_likely
 
+    @staticmethod
+    def _split(lines, delim):
+        if isinstance(delim, FixedWidthLayout):
+            return [delim.split(line) for line in lines]
+        if delim is None:
+            return [split_line(line.strip(), None) for line in lines]
+        return split_records(lines, delim)
+
+    def parse_file(self, filepath, prefix_bytes=1 << 16):
+        lines = read_prefix_lines(filepath, prefix_bytes, strip=False)
+        if not lines:
+            return [], []
+
+        delim, header_likely = self._detect(lines)
+        rows = read_rows(filepath, delim, skip_header=header_likely)
+        if header_likely:
+            return self._split(lines[:1], delim)[0], rows
+        return [], rows
+
+    def name_columns(self, samples):
+        names = []
+        genai_guesses = self.genai.infer_column_names(samples, batch=self.batch_prompt)
+        for i, (sample, genai_guess) in enumerate(zip(samples, genai_guesses)):
+            names.append(self.genai.match_against_kb(sample, genai_guess) or f"col_{i}")
+        self.genai.cache.flush()
+        stats = self.genai.cache.stats()
+        print(f"[ℹ️] GenAI cache: {stats['hits']} hits, {stats['misses']} misses")
+        return names
 
     def infer_columns(self, data_rows):
         guessed = []
-        for i, col_vals in enumerate(zip(*data_rows)):
-            sample = list(col_vals)[:20]
-            genai_guess = self.genai.infer_column_name(sample)
-            final_col_name = self.genai.match_against_kb(sample, genai_guess) or f"col_{i}"
+        columns = [list(col_vals) for col_vals in zip(*data_rows)]
+        samples = [Reservoir(self.prompt_values).update(col_vals).values for col_vals in columns]
+        for col_vals, final_col_name in zip(columns, self.name_columns(samples)):
             self.kb.add_column(final_col_name)
-            self.kb.update_patterns(final_col_name, sample)
+            self.kb.update_patterns(final_col_name, col_vals)
             guessed.append(final_col_name)
         return guessed
 
+    def learn_file(self, filepath, chunk_rows=50_000, prefix_bytes=1 << 16):
+        """Layout from a bounded prefix, then per-column profiles streamed chunk by chunk into the KB.
+
+        A file whose bytes this KB already learned with the same sampling settings is answered
+        from the profile cache, so repeat runs skip parsing and GenAI and do not count the same
+        rows twice.
+        """
+        cache_key = self.profile_cache.key(filepath, kb=os.path.abspath(self.kb.path), sample_budget=self.sample_budget,
+                                           stratify=self.stratify, prefix_bytes=prefix_bytes)
+        cached = self.profile_cache.get(cache_key)
+        if cached:
+            print("[ℹ️] Input unchanged since it was last learned. Skipping profiling.")
+            columns = []
+            for header, col, profile in zip(cached["headers"], cached["columns"], cached["profiles"]):
+                if col in self.kb.columns:
+                    columns.append(col)
+                else:
+                    columns.append(self.kb.add_column(header))
+                    self.kb.merge_profile(columns[-1], profile)
+            self.layout = cached["layout"]
+        else:
+            columns = self._learn_file(filepath, cache_key, chunk_rows, prefix_bytes)
+        # The KB is saved before the cache entry that says it holds this file is committed
+        self.kb.save()
+        self.profile_cache.flush()
+        stats = self.profile_cache.stats()
+        print(f"[ℹ️] Profile cache: {stats['hits']} hits, {stats['misses']} misses")
+        return columns
+
+    def _learn_file(self, filepath, cache_key, chunk_rows, prefix_bytes):
+        lines = read_prefix_lines(filepath, prefix_bytes, strip=False)
+        if not lines:
+            return []
+        delim, header_likely = self._detect(lines)
+        self.layout = delim if isinstance(delim, FixedWidthLayout) else None
+        profiles = profile_file(filepath, delim, header_likely, chunk_rows, self.kb.value_budget,
+                                sample_budget=self.sample_budget, stratify=self.stratify)
+
+        if header_likely:
+            print("[ℹ️] Header detected. Using KB only.")
+            headers = self._split(lines[:1], delim)[0]
+            columns = [self.kb.add_column(col) for col in headers]
+        else:
+            print("[ℹ️] No header detected. Using GenAI + KB for column inference.")
+            samples = [subsample(p.sample.values, self.prompt_values) for p in profiles]
+            headers = columns = self.name_columns(samples)
+            for col in columns:
+                self.kb.add_column(col)
+
+        profiles += [ColumnProfile() for _ in range(len(columns) - len(profiles))]
+        for col, profile in zip(columns, profiles):
+            self.kb.merge_profile(col, profile)
+        self.profile_cache.set(cache_key, headers, columns, profiles[:len(columns)], self.layout)
+        return columns
+
     def learn(self, columns, data_rows):
         if not columns:
             return self.infer_columns(data_rows)
@@ -243,57 +305,36 @@ class MockGenerator:
             canonical.append(canon)
         return canonical
 
-    def generate_value(self, col, i):
-        patterns = self.kb.patterns.get(col, [])
-        stats = self.kb.stats.get(col, {})
-        common = [v for v, _ in self.kb.value_sets[col].most_common(10)]
-        if col in self.kb.uniques:
-            if "int" in patterns:
-                val = int(stats.get("min", 1000)) + len(self.generated_uniques[col])
-                self.generated_uniques[col].add(val)
-                return val
-            if "text" in patterns:
-                while True:
-                    val = faker.uuid4()
-                    if val not in self.generated_uniques[col]:
-                        self.generated_uniques[col].add(val)
-                        return val
-        if "int" in patterns:
-            return faker.random_int(min=int(stats.get("min", 1000)), max=int(stats.get("max", 9999)))
-        if "float" in patterns:
-            mu, sigma = stats.get("mean", 100.0), stats.get("std", 10.0)
-            return round(faker.random.uniform(mu - sigma, mu + sigma), 2)
-        if "date" in patterns:
-            return faker.date()
-        if "boolean" in patterns:
-            return faker.random_element(["Yes", "No"])
-        if common:
-            return faker.random_element(common)
-        return faker.word()
-
     def generate(self, columns):
-        return [{col: self.generate_value(col, i) for col in columns} for i in range(self.records)]
+        return self.engine.generate_frame(columns, self.records)
+
+    def write_csv(self, columns, output_file, batch_size=100_000, shards=1):
+        if shards > 1:
+            return write_csv_sharded(self.kb, columns, output_file, self.records, shards, self.seed, batch_size=batch_size)
+        return self.engine.write_csv(columns, output_file, batch_size, self.records)
+
+    def write_fixed_width(self, columns, output_file, batch_size=100_000):
+        if self.layout is None:
+            raise ValueError("Fixed-width output needs a fixed-width input to take the layout from")
+        return self.engine.write_fixed_width(columns, output_file, self.layout, batch_size, self.records)
 
 # ------------------ Main ------------------ #
 
-def main(input_file, output_file, rows, genai_url, preset_id):
+def main(input_file, output_file, rows, genai_url, preset_id, batch_size=100_000, shards=1, seed=None,
+         batch_prompt=False, fixed_width=False):
     kb = KnowledgeBase()
     genai = GenAIColumnInferer(kb, genai_url, preset_id)
-    gen = MockGenerator(kb, genai, rows)
-    cols, data = gen.parse_file(input_file)
+    gen = MockGenerator(kb, genai, rows, seed, batch_prompt)
+    canonical_cols = gen.learn_file(input_file)
 
-    if not data:
+    if not canonical_cols:
         print("[❌] Failed to parse input file. Check format or delimiter.")
         return
 
-    if cols:
-        print("[ℹ️] Header detected. Using KB only.")
+    if fixed_width:
+        gen.write_fixed_width(canonical_cols, output_file, batch_size)
     else:
-        print("[ℹ️] No header detected. Using GenAI + KB for column inference.")
-
-    canonical_cols = gen.learn(cols, data)
-    mock = gen.generate(canonical_cols)
-    pd.DataFrame(mock)[canonical_cols].to_csv(output_file, index=False)
+        gen.write_csv(canonical_cols, output_file, batch_size, shards)
     kb.save()
     print(f"[✅] {rows} mock rows written to {output_file}")
 
@@ -0,0 +1,132 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate import GenAIColumnInferer
+
+# ------------ Stub GenAI Server ------------
+class StubGenAI(ThreadingHTTPServer):
+    """Answers column-name prompts after `delay` seconds, failing the first `failures` with 503."""
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.2, failures=0):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/genai"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            failing = server.failures > 0
+            server.failures -= failing
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if failing:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._reply(query)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _reply(self, query):
+        if "Columns: " in query:
+            samples = json.loads(query.split("Columns: ", 1)[1])
+            output = json.dumps({"columns": [name_for(s) for s in samples]})
+        else:
+            values = json.loads(query.split("Values: ", 1)[1])
+            output = json.dumps({"column_name": name_for(values)})
+        body = json.dumps({"output": output}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def name_for(values):
+    return "col_" + re.sub(r"\W", "_", values[0]).lower()
+
+SAMPLES = [["alice", "bob"], ["paris", "rome"], ["red", "blue"], ["cat", "dog"]]
+EXPECTED = ["col_alice", "col_paris", "col_red", "col_cat"]
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server = StubGenAI(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def inferer(server, tmp_path, **kwargs):
+    return GenAIColumnInferer(None, server.url, "preset", cache_path=str(tmp_path / "genai_cache.db"),
+                              timeout=5, backoff=0, **kwargs)
+
+# ------------ Tests ------------
+def test_per_column_requests_run_concurrently(stub, tmp_path):
+    server = stub(delay=0.3)
+    started = time.perf_counter()
+    names = inferer(server, tmp_path, max_workers=4).infer_column_names(SAMPLES)
+    elapsed = time.perf_counter() - started
+
+    assert names == EXPECTED
+    assert server.calls == len(SAMPLES)
+    assert server.max_active > 1
+    assert elapsed < 0.3 * len(SAMPLES)
+
+def test_503_is_retried(stub, tmp_path):
+    server = stub(delay=0, failures=2)
+    names = inferer(server, tmp_path, max_workers=1, retries=3).infer_column_names(SAMPLES[:1])
+
+    assert names == EXPECTED[:1]
+    assert server.calls == 3
+
+def test_batch_prompt_parses_into_one_name_per_column(stub, tmp_path):
+    server = stub(delay=0)
+    names = inferer(server, tmp_path).infer_column_names(SAMPLES, batch=True)
+
+    assert names == EXPECTED
+    assert server.calls == 1
+
+def test_second_run_is_answered_from_cache(stub, tmp_path):
+    server = stub(delay=0)
+    first = inferer(server, tmp_path)
+    assert first.infer_column_names(SAMPLES) == EXPECTED
+    first.cache.flush()
+    server.calls = 0
+
+    second = inferer(server, tmp_path)
+    assert second.infer_column_names(SAMPLES) == EXPECTED
+    assert server.calls == 0
+    assert second.cache.stats()["hits"] == len(SAMPLES)